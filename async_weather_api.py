@@ -0,0 +1,226 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Set
+
+from weather_api import (
+    CACHE_TTL,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_POOL_SIZE,
+    PRIORITY_BACKGROUND,
+    PRIORITY_HIGH,
+    BatchResult,
+    ProviderError,
+    ProviderUnavailable,
+    RateLimitExceeded,
+    ResponseCache,
+    WeatherAPI,
+    _decode_json,
+    _get_provider_health,
+    _get_rate_limiter
+)
+
+# Maximum number of provider requests in flight at once per client
+ASYNC_MAX_CONCURRENCY = 20
+
+
+class AsyncWeatherAPI:
+    """asyncio counterpart of WeatherAPI for fetching many cities on one thread.
+
+    Provider selection and failover, circuit breakers, rate limits, city
+    resolution, response normalization and the shared response cache all
+    come from WeatherAPI, so both clients return identical dicts and react
+    to outages the same way. Use as an async context manager, or call close() when
+    done, to release the connection pool.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[ResponseCache] = None,
+        max_concurrency: int = ASYNC_MAX_CONCURRENCY,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        read_timeout: float = HTTP_READ_TIMEOUT,
+        pool_size: int = HTTP_POOL_SIZE
+    ):
+        self._api = WeatherAPI(cache=cache)
+        self.cache = self._api.cache
+        self.provider = self._api.provider
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session = None
+        self._refresh_tasks: Set[asyncio.Task] = set()
+
+    async def __aenter__(self) -> "AsyncWeatherAPI":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """Close the pooled HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self):
+        """Create the pooled aiohttp session on first use (it must belong to the running loop)"""
+        if self._session is None:
+            import aiohttp
+
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout)
+            )
+        return self._session
+
+    async def get_current_weather(self, city: str, priority: str = PRIORITY_HIGH) -> Dict:
+        """Get current weather for a city"""
+        return await self._cached_fetch("current", self._api._resolve_city(city), priority)
+
+    async def get_forecast(self, city: str, priority: str = PRIORITY_HIGH) -> Dict:
+        """Get forecast for a city"""
+        return await self._cached_fetch("forecast", self._api._resolve_city(city), priority)
+
+    async def get_current_weather_many(
+        self,
+        cities: List[str],
+        deadline: Optional[float] = None,
+        priority: str = PRIORITY_HIGH
+    ) -> List[BatchResult]:
+        """Get current weather for many cities concurrently, in input order.
+
+        Requests still running after `deadline` seconds are cancelled and
+        reported as TimeoutError.
+        """
+        return await self._fetch_many(self.get_current_weather, cities, deadline, priority)
+
+    async def get_forecast_many(
+        self,
+        cities: List[str],
+        deadline: Optional[float] = None,
+        priority: str = PRIORITY_HIGH
+    ) -> List[BatchResult]:
+        """Get forecasts for many cities concurrently, in input order"""
+        return await self._fetch_many(self.get_forecast, cities, deadline, priority)
+
+    async def _fetch_many(self, fetch, cities: List[str], deadline: Optional[float], priority: str) -> List[BatchResult]:
+        """Run a per-city coroutine for every city, cancelling whatever misses the deadline"""
+        tasks = [asyncio.ensure_future(fetch(city, priority)) for city in cities]
+        if not tasks:
+            return []
+
+        _, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        results = []
+        for city, task in zip(cities, tasks):
+            if task in pending:
+                results.append(BatchResult(city, None, TimeoutError(f"Deadline exceeded fetching {city}")))
+            elif task.exception() is not None:
+                results.append(BatchResult(city, None, task.exception()))
+            else:
+                results.append(BatchResult(city, task.result(), None))
+        return results
+
+    async def _cached_fetch(self, endpoint: str, city: str, priority: str) -> Dict:
+        """Serve from the shared cache, refreshing stale entries in a background task"""
+        key = self._api._cache_key(endpoint, city)
+        value, fresh = self.cache.get(key)
+        if value is not None:
+            if not fresh and self.cache.begin_refresh(key):
+                task = asyncio.ensure_future(self._revalidate(key, endpoint, city))
+                self._refresh_tasks.add(task)
+                task.add_done_callback(self._refresh_tasks.discard)
+            return value
+
+        value = await self._fetch(endpoint, city, priority)
+        self._store(key, endpoint, city, value)
+        return value
+
+    def _store(self, key, endpoint: str, city: str, value: Dict):
+        """Cache a fetched response, recording current conditions to the history store"""
+        self.cache.set(key, value, CACHE_TTL[endpoint])
+        if endpoint == "current":
+            self._api._record(city, value)
+
+    async def _revalidate(self, key, endpoint: str, city: str):
+        """Refresh a stale cache entry"""
+        try:
+            self._store(key, endpoint, city, await self._fetch(endpoint, city, PRIORITY_BACKGROUND))
+        except Exception:
+            # Keep serving the stale entry; the next request will try again
+            pass
+        finally:
+            self.cache.end_refresh(key)
+
+    async def _acquire(self, priority: str, provider: str):
+        """Wait for a provider's shared rate limiter without blocking the event loop"""
+        limiter = _get_rate_limiter(provider)
+        if limiter is None:
+            return
+        for delay in limiter.waits(priority):
+            await asyncio.sleep(delay)
+
+    async def _fetch(self, endpoint: str, city: str, priority: str) -> Dict:
+        """Fetch and normalize one provider response from the first healthy provider, failing over to the next"""
+        if self._api.use_mock_data:
+            if endpoint == "current":
+                return self._api._get_mock_current_weather(city)
+            return self._api._get_mock_forecast(city)
+
+        fetchers = self._api._provider_fetchers
+        candidates = [provider for provider in self._api.providers if endpoint in fetchers[provider]]
+        last_error: Optional[Exception] = None
+        for provider in candidates:
+            try:
+                return await self._call_provider(provider, endpoint, city, priority)
+            except Exception as e:
+                last_error = e
+        raise last_error
+
+    async def _call_provider(self, provider: str, endpoint: str, city: str, priority: str) -> Dict:
+        """Call one provider, enforcing its circuit breaker and rate limit and recording its health"""
+        breaker, latency = _get_provider_health(provider)
+        if not breaker.allow_request():
+            raise ProviderUnavailable(f"{provider} is temporarily unavailable")
+
+        try:
+            await self._acquire(priority, provider)
+        except (RateLimitExceeded, asyncio.CancelledError):
+            # Not the provider's fault; hand back a half-open probe without judging it
+            breaker.release_probe()
+            raise
+
+        start = time.monotonic()
+        try:
+            value = await self._request(provider, endpoint, city)
+        except asyncio.CancelledError:
+            # Deadline cancellations say nothing about the provider either
+            breaker.release_probe()
+            raise
+        except Exception as e:
+            breaker.record_error(e)
+            raise
+        breaker.record_success()
+        latency.record(time.monotonic() - start)
+        return value
+
+    async def _request(self, provider: str, endpoint: str, city: str) -> Dict:
+        """GET and normalize one provider response"""
+        url, params, normalize = self._api._provider_request(provider, endpoint, city)
+        session = self._get_session()
+        async with self._semaphore:
+            async with session.get(url, params=params) as response:
+                if response.status != 200:
+                    kind = "weather" if endpoint == "current" else "forecast"
+                    raise ProviderError(
+                        f"Failed to fetch {kind} data for {city}: {await response.text()}", response.status
+                    )
+                data = _decode_json(await response.read())
+        return normalize(data)
@@ -0,0 +1,201 @@
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional, Tuple
+import re
+
+
+class City(NamedTuple):
+    """One Israeli city: stable id, English and Hebrew names, alternative spellings, centre and region"""
+    id: str
+    english: str
+    hebrew: str
+    aliases: Tuple[str, ...]
+    lat: float
+    lon: float
+    region: str
+
+
+# Every city the app knows, in display order. Coordinates are the city centre (WGS84),
+# generated once from the providers' geocoders so weather lookups can query by
+# coordinates instead of having the provider geocode the name on every call.
+CITIES: Tuple[City, ...] = (
+    # Major Cities
+    City("jerusalem", "Jerusalem", "ירושלים", (), 31.7683, 35.2137, "Major Cities"),
+    City("tel-aviv", "Tel Aviv", "תל אביב", ("Tel Aviv-Yafo", "Tel Aviv-Jaffa"), 32.0853, 34.7818, "Major Cities"),
+    City("haifa", "Haifa", "חיפה", (), 32.7940, 34.9896, "Major Cities"),
+    City("rishon-lezion", "Rishon LeZion", "ראשון לציון", ("Rishon LeTsiyon",), 31.9730, 34.7925, "Major Cities"),
+    City("petah-tikva", "Petah Tikva", "פתח תקווה", ("Petach Tikva", "Petah Tiqva"), 32.0840, 34.8878, "Major Cities"),
+    City("ashdod", "Ashdod", "אשדוד", (), 31.8044, 34.6553, "Major Cities"),
+    City("netanya", "Netanya", "נתניה", (), 32.3215, 34.8532, "Major Cities"),
+    City("beer-sheva", "Be'er Sheva", "באר שבע", ("Beersheba", "Be'er Sheba"), 31.2518, 34.7913, "Major Cities"),
+    City("holon", "Holon", "חולון", (), 32.0158, 34.7874, "Major Cities"),
+    City("ramat-gan", "Ramat Gan", "רמת גן", (), 32.0684, 34.8248, "Major Cities"),
+
+    # Regional Centers
+    City("herzliya", "Herzliya", "הרצליה", ("Herzliyya",), 32.1663, 34.8433, "Regional Centers"),
+    City("rehovot", "Rehovot", "רחובות", (), 31.8928, 34.8113, "Regional Centers"),
+    City("bat-yam", "Bat Yam", "בת ים", (), 32.0132, 34.7480, "Regional Centers"),
+    City("ashkelon", "Ashkelon", "אשקלון", (), 31.6688, 34.5743, "Regional Centers"),
+    City("kfar-saba", "Kfar Saba", "כפר סבא", (), 32.1750, 34.9069, "Regional Centers"),
+    City("raanana", "Ra'anana", "רעננה", (), 32.1848, 34.8713, "Regional Centers"),
+    City("modiin", "Modiin", "מודיעין", ("Modi'in-Maccabim-Re'ut",), 31.8980, 35.0104, "Regional Centers"),
+    City("nahariya", "Nahariya", "נהריה", (), 33.0058, 35.0941, "Regional Centers"),
+    City("lod", "Lod", "לוד", (), 31.9510, 34.8881, "Regional Centers"),
+    City("givatayim", "Givatayim", "גבעתיים", (), 32.0722, 34.8125, "Regional Centers"),
+
+    # Haifa Metropolitan Area (Krayot)
+    City("kiryat-bialik", "Kiryat Bialik", "קרית ביאליק", (), 32.8275, 35.0858, "Haifa Metropolitan Area (Krayot)"),
+    City("kiryat-motzkin", "Kiryat Motzkin", "קרית מוצקין", (), 32.8371, 35.0776, "Haifa Metropolitan Area (Krayot)"),
+    City("kiryat-yam", "Kiryat Yam", "קרית ים", (), 32.8497, 35.0669, "Haifa Metropolitan Area (Krayot)"),
+    City("kiryat-ata", "Kiryat Ata", "קרית אתא", (), 32.8115, 35.1132, "Haifa Metropolitan Area (Krayot)"),
+    City("kiryat-haim", "Kiryat Haim", "קרית חיים", (), 32.8256, 35.0577, "Haifa Metropolitan Area (Krayot)"),
+    City("nesher", "Nesher", "נשר", (), 32.7662, 35.0440, "Haifa Metropolitan Area (Krayot)"),
+    City("tirat-carmel", "Tirat Carmel", "טירת כרמל", (), 32.7602, 34.9718, "Haifa Metropolitan Area (Krayot)"),
+
+    # Northern Cities
+    City("tiberias", "Tiberias", "טבריה", (), 32.7922, 35.5312, "Northern Cities"),
+    City("safed", "Safed", "צפת", ("Tzfat", "Zefat"), 32.9646, 35.4960, "Northern Cities"),
+    City("acre", "Acre", "עכו", ("Akko",), 32.9281, 35.0818, "Northern Cities"),
+    City("kiryat-shmona", "Kiryat Shmona", "קרית שמונה", (), 33.2073, 35.5721, "Northern Cities"),
+    City("afula", "Afula", "עפולה", (), 32.6078, 35.2897, "Northern Cities"),
+    City("nazareth", "Nazareth", "נצרת", (), 32.7021, 35.2978, "Northern Cities"),
+    City("migdal-haemek", "Migdal HaEmek", "מגדל העמק", (), 32.6747, 35.2396, "Northern Cities"),
+    City("yokneam", "Yokneam", "יקנעם", ("Yokneam Illit",), 32.6591, 35.1097, "Northern Cities"),
+    City("kiryat-tivon", "Kiryat Tivon", "קרית טבעון", (), 32.7163, 35.1266, "Northern Cities"),
+    City("rosh-pina", "Rosh Pina", "ראש פינה", (), 32.9690, 35.5424, "Northern Cities"),
+    City("metula", "Metula", "מטולה", (), 33.2779, 35.5786, "Northern Cities"),
+    City("maalot-tarshiha", "Ma'alot-Tarshiha", "מעלות-תרשיחא", (), 33.0167, 35.2708, "Northern Cities"),
+    City("karmiel", "Karmiel", "כרמיאל", (), 32.9190, 35.2951, "Northern Cities"),
+
+    # Central Region
+    City("ramat-hasharon", "Ramat HaSharon", "רמת השרון", (), 32.1461, 34.8394, "Central Region"),
+    City("hod-hasharon", "Hod HaSharon", "הוד השרון", (), 32.1500, 34.8880, "Central Region"),
+    City("rosh-haayin", "Rosh HaAyin", "ראש העין", (), 32.0956, 34.9566, "Central Region"),
+    City("yavne", "Yavne", "יבנה", (), 31.8781, 34.7383, "Central Region"),
+    City("ramla", "Ramla", "רמלה", (), 31.9279, 34.8625, "Central Region"),
+    City("ness-ziona", "Ness Ziona", "נס ציונה", ("Nes Ziona",), 31.9293, 34.7987, "Central Region"),
+    City("or-yehuda", "Or Yehuda", "אור יהודה", (), 32.0290, 34.8566, "Central Region"),
+    City("ganei-tikva", "Ganei Tikva", "גני תקווה", (), 32.0597, 34.8733, "Central Region"),
+    City("kiryat-ono", "Kiryat Ono", "קרית אונו", (), 32.0636, 34.8553, "Central Region"),
+    City("shoham", "Shoham", "שוהם", (), 31.9987, 34.9468, "Central Region"),
+    City("even-yehuda", "Even Yehuda", "אבן יהודה", (), 32.2697, 34.8877, "Central Region"),
+    City("kadima-zoran", "Kadima-Zoran", "קדימה-צורן", (), 32.2776, 34.9156, "Central Region"),
+    City("tel-mond", "Tel Mond", "תל מונד", (), 32.2496, 34.9177, "Central Region"),
+    City("kfar-yona", "Kfar Yona", "כפר יונה", (), 32.3171, 34.9351, "Central Region"),
+    City("givat-shmuel", "Givat Shmuel", "גבעת שמואל", (), 32.0779, 34.8485, "Central Region"),
+    City("yehud", "Yehud", "יהוד", (), 32.0333, 34.8833, "Central Region"),
+
+    # Southern Cities
+    City("eilat", "Eilat", "אילת", (), 29.5577, 34.9519, "Southern Cities"),
+    City("dimona", "Dimona", "דימונה", (), 31.0700, 35.0333, "Southern Cities"),
+    City("arad", "Arad", "ערד", (), 31.2589, 35.2128, "Southern Cities"),
+    City("sderot", "Sderot", "שדרות", (), 31.5250, 34.5966, "Southern Cities"),
+    City("ofakim", "Ofakim", "אופקים", (), 31.3141, 34.6203, "Southern Cities"),
+    City("kiryat-gat", "Kiryat Gat", "קרית גת", (), 31.6100, 34.7642, "Southern Cities"),
+    City("yeroham", "Yeroham", "ירוחם", ("Yeruham",), 30.9874, 34.9313, "Southern Cities"),
+    City("mitzpe-ramon", "Mitzpe Ramon", "מצפה רמון", (), 30.6103, 34.8011, "Southern Cities"),
+    City("netivot", "Netivot", "נתיבות", (), 31.4231, 34.5889, "Southern Cities"),
+    City("rahat", "Rahat", "רהט", (), 31.3925, 34.7544, "Southern Cities"),
+    City("kiryat-malakhi", "Kiryat Malakhi", "קרית מלאכי", ("Kiryat Malachi",), 31.7306, 34.7453, "Southern Cities"),
+    City("beer-yaakov", "Beer Yaakov", "באר יעקב", (), 31.9425, 34.8345, "Southern Cities"),
+    City("kuseife", "Kuseife", "כוסייפה", (), 31.2449, 35.0916, "Southern Cities"),
+    City("tel-sheva", "Tel Sheva", "תל שבע", (), 31.2496, 34.8646, "Southern Cities"),
+    City("lehavim", "Lehavim", "להבים", (), 31.3729, 34.8163, "Southern Cities"),
+    City("meitar", "Meitar", "מיתר", (), 31.3244, 34.9378, "Southern Cities"),
+    City("omer", "Omer", "עומר", (), 31.2647, 34.8496, "Southern Cities"),
+
+    # Sharon Region
+    City("hadera", "Hadera", "חדרה", (), 32.4340, 34.9197, "Sharon Region"),
+    City("pardes-hanna-karkur", "Pardes Hanna-Karkur", "פרדס חנה-כרכור", (), 32.4731, 34.9700, "Sharon Region"),
+    City("zichron-yaakov", "Zichron Yaakov", "זכרון יעקב", ("Zikhron Ya'akov",), 32.5707, 34.9519, "Sharon Region"),
+    City("or-akiva", "Or Akiva", "אור עקיבא", (), 32.5078, 34.9194, "Sharon Region"),
+    City("binyamina", "Binyamina", "בנימינה", (), 32.5196, 34.9449, "Sharon Region"),
+    City("givat-ada", "Givat Ada", "גבעת עדה", (), 32.5203, 35.0004, "Sharon Region"),
+    City("karkur", "Karkur", "כרכור", (), 32.4634, 34.9788, "Sharon Region"),
+    City("caesarea", "Caesarea", "קיסריה", (), 32.5190, 34.9045, "Sharon Region"),
+    City("bat-hefer", "Bat Hefer", "בת חפר", (), 32.3332, 35.0076, "Sharon Region"),
+    City("ein-iron", "Ein Iron", "עין איירון", (), 32.4790, 35.0100, "Sharon Region"),
+
+    # Judea and Samaria
+    City("maale-adumim", "Maale Adumim", "מעלה אדומים", (), 31.7770, 35.2981, "Judea and Samaria"),
+    City("ariel", "Ariel", "אריאל", (), 32.1047, 35.1727, "Judea and Samaria"),
+    City("beitar-illit", "Beitar Illit", "ביתר עילית", (), 31.6997, 35.1156, "Judea and Samaria"),
+    City("modiin-illit", "Modiin Illit", "מודיעין עילית", (), 31.9322, 35.0431, "Judea and Samaria"),
+    City("efrat", "Efrat", "אפרת", (), 31.6570, 35.1498, "Judea and Samaria"),
+    City("kiryat-arba", "Kiryat Arba", "קרית ארבע", (), 31.5313, 35.1199, "Judea and Samaria"),
+    City("alfei-menashe", "Alfei Menashe", "אלפי מנשה", (), 32.1647, 34.9834, "Judea and Samaria"),
+    City("oranit", "Oranit", "אורנית", (), 32.1306, 34.9889, "Judea and Samaria"),
+    City("elkana", "Elkana", "אלקנה", (), 32.1097, 35.0319, "Judea and Samaria"),
+    City("karnei-shomron", "Karnei Shomron", "קרני שומרון", (), 32.1724, 35.0963, "Judea and Samaria"),
+    City("kedumim", "Kedumim", "קדומים", (), 32.2135, 35.1594, "Judea and Samaria"),
+    City("beit-el", "Beit El", "בית אל", (), 31.9436, 35.2226, "Judea and Samaria"),
+    City("kochav-yaakov", "Kochav Yaakov", "כוכב יעקב", (), 31.8817, 35.2469, "Judea and Samaria"),
+
+    # Galilee Region
+    City("sakhnin", "Sakhnin", "סח'נין", (), 32.8647, 35.2972, "Galilee Region"),
+    City("tamra", "Tamra", "טמרה", (), 32.8536, 35.1978, "Galilee Region"),
+    City("shfaram", "Shfaram", "שפרעם", ("Shefa-Amr",), 32.8056, 35.1694, "Galilee Region"),
+    City("majd-al-krum", "Majd al-Krum", "מג'ד אל-כרום", (), 32.9200, 35.2500, "Galilee Region"),
+    City("maghar", "Maghar", "מגאר", (), 32.8897, 35.4078, "Galilee Region"),
+    City("arraba", "Arraba", "עראבה", (), 32.8514, 35.3381, "Galilee Region"),
+    City("ibillin", "I'billin", "אעבלין", (), 32.8217, 35.1900, "Galilee Region"),
+    City("kafr-kanna", "Kafr Kanna", "כפר כנא", (), 32.7461, 35.3428, "Galilee Region"),
+    City("yafa-an-naseriyye", "Yafa an-Naseriyye", "יאפא א-נאצרה", (), 32.6933, 35.2775, "Galilee Region"),
+    City("julis", "Julis", "ג'וליס", (), 32.9439, 35.1867, "Galilee Region"),
+    City("abu-sinan", "Abu Sinan", "אבו סנאן", (), 32.9550, 35.1703, "Galilee Region"),
+    City("jadeidi-makr", "Jadeidi-Makr", "ג'דיידה-מכר", (), 32.9284, 35.1514, "Galilee Region"),
+)
+
+
+def _normalize(name: str) -> str:
+    """Casefold a city name and drop the punctuation and spacing spellings disagree on"""
+    return re.sub(r"[\s'’`׳\-־]", "", name.casefold())
+
+
+def _slug(name: str) -> str:
+    """Id-style key for a name: lowercase words joined by hyphens, without apostrophes"""
+    return re.sub(r"[^0-9a-z\u0590-\u05ff]+", "-", re.sub(r"['’`׳]", "", name.casefold())).strip("-")
+
+
+# Lookups built once at import and read-only from then on
+CITY_BY_ID: Mapping[str, City] = MappingProxyType({city.id: city for city in CITIES})
+_CITY_BY_NAME: Mapping[str, City] = MappingProxyType({
+    _normalize(name): city
+    for city in CITIES
+    for name in (*city.aliases, city.hebrew, city.english)
+})
+
+# English and Hebrew names in display order
+CITY_NAMES: Tuple[str, ...] = tuple(city.english for city in CITIES)
+HEBREW_CITY_NAMES: Tuple[str, ...] = tuple(city.hebrew for city in CITIES)
+
+
+def get_city(name: str) -> Optional[City]:
+    """Look up a city by English name, Hebrew name or alternative spelling"""
+    return _CITY_BY_NAME.get(_normalize(name))
+
+
+def canonical_city_name(name: str) -> str:
+    """Map any known spelling of a city ("Beer Sheva", "Beersheba", "באר שבע") to its English name.
+
+    Unknown names are returned unchanged apart from whitespace normalization.
+    """
+    city = get_city(name)
+    return city.english if city is not None else " ".join(name.split())
+
+
+def hebrew_city_name(name: str) -> str:
+    """Hebrew name of a city by any known spelling; unknown names are returned unchanged"""
+    city = get_city(name)
+    return city.hebrew if city is not None else name
+
+
+def city_key(name: str) -> str:
+    """Key identifying a city across caches, snapshots and history: its id, or a slug of an unknown name"""
+    city = get_city(name)
+    return city.id if city is not None else _slug(name)
+
+
+def get_coordinates(name: str) -> Optional[Tuple[float, float]]:
+    """Return (lat, lon) for a city by any known spelling, or None if it isn't in the registry"""
+    city = get_city(name)
+    return (city.lat, city.lon) if city is not None else None
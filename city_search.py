@@ -0,0 +1,198 @@
+import re
+import unicodedata
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from fuzzywuzzy import fuzz
+
+from city_registry import CITIES, City, get_city
+
+# Candidates scored with fuzz.partial_ratio per query, best trigram overlap first
+SEARCH_MAX_CANDIDATES = 64
+
+# Share of the query's trigrams a name must contain to be scored at all
+SEARCH_MIN_OVERLAP = 0.3
+
+# Most completions kept per trie node (and so returned per prefix lookup)
+AUTOCOMPLETE_MAX_RESULTS = 10
+
+
+class SearchResult(NamedTuple):
+    """One ranked match: the canonical English city, the spelling that matched and its score (0-100)"""
+    city: str
+    name: str
+    score: int
+
+
+def _normalize(text: str) -> str:
+    """Casefold, drop apostrophes (including Hebrew geresh) and treat hyphens as spaces"""
+    text = re.sub(r"['’`׳]", "", text.casefold())
+    return " ".join(re.sub(r"[-־]", " ", text).split())
+
+
+def _trigrams(text: str) -> List[str]:
+    """Distinct trigrams of a normalized string, padded so word starts and short queries get their own"""
+    padded = "  " + text + " "
+    return list(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+
+class CityIndex:
+    """Trigram index over every spelling of a set of cities.
+
+    Each English name, Hebrew name and alias is indexed once. A query
+    looks up its trigrams' posting lists, counts overlaps per name with one
+    bincount, and scores only the best-overlapping names with
+    fuzz.partial_ratio, so its cost follows the number of matches rather
+    than the number of cities.
+    """
+
+    def __init__(self, names: Iterable[Tuple[str, str]]):
+        # (spelling, canonical city) pairs, one per distinct normalized spelling
+        entries: Dict[str, Tuple[str, str]] = {}
+        for name, city in names:
+            entries.setdefault(_normalize(name), (name, city))
+
+        self._keys = list(entries)
+        self._names = [entries[key][0] for key in self._keys]
+        self._cities = [entries[key][1] for key in self._keys]
+
+        postings: Dict[str, List[int]] = {}
+        for i, key in enumerate(self._keys):
+            for trigram in _trigrams(key):
+                postings.setdefault(trigram, []).append(i)
+        self._postings = {trigram: np.array(ids, dtype=np.int32) for trigram, ids in postings.items()}
+
+    @classmethod
+    def from_cities(cls, cities: Iterable[str]) -> "CityIndex":
+        """Index cities under their English names, Hebrew names and the registry's alternative spellings"""
+        names = []
+        for name in cities:
+            city = get_city(name)
+            if city is None:
+                names.append((name, name))
+                continue
+            names.extend((spelling, city.english) for spelling in (city.english, city.hebrew, *city.aliases))
+        return cls(names)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def search(self, query: str, limit: int = 10, min_score: int = 60) -> List[SearchResult]:
+        """Best matches for a query in any indexed spelling, highest score first, one result per city"""
+        query = _normalize(query)
+        if not query:
+            return []
+
+        trigrams = _trigrams(query)
+        lists = [self._postings[trigram] for trigram in trigrams if trigram in self._postings]
+        if not lists:
+            return []
+        overlap = np.bincount(np.concatenate(lists), minlength=len(self._keys))
+
+        # Candidate filtering: only names sharing enough of the query's trigrams are scored
+        candidates = np.flatnonzero(overlap >= max(1, int(np.ceil(len(trigrams) * SEARCH_MIN_OVERLAP))))
+        if len(candidates) > SEARCH_MAX_CANDIDATES:
+            top = np.argpartition(-overlap[candidates], SEARCH_MAX_CANDIDATES)[:SEARCH_MAX_CANDIDATES]
+            candidates = candidates[top]
+
+        best: Dict[str, SearchResult] = {}
+        for i in candidates.tolist():
+            score = fuzz.partial_ratio(query, self._keys[i])
+            city = self._cities[i]
+            if score >= min_score and (city not in best or score > best[city].score):
+                best[city] = SearchResult(city, self._names[i], score)
+
+        # Ties go to the shorter (closer) spelling, then alphabetically
+        ranked = sorted(best.values(), key=lambda result: (-result.score, len(result.name), result.city))
+        return ranked[:limit]
+
+
+_default_index: Optional[CityIndex] = None
+
+
+def get_city_index() -> CityIndex:
+    """Index over every city in the registry, built on first use"""
+    global _default_index
+    if _default_index is None:
+        _default_index = CityIndex.from_cities(city.english for city in CITIES)
+    return _default_index
+
+
+def _normalize_prefix(text: str) -> str:
+    """Like _normalize, but also strips niqqud, cantillation and other combining marks"""
+    text = unicodedata.normalize("NFD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _normalize(text.replace('"', "").replace("״", ""))
+
+
+class _TrieNode:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        # Most popular cities under this prefix, best first
+        self.top: List[City] = []
+
+
+class CityTrie:
+    """Prefix trie over the English, Hebrew and alternative names of cities.
+
+    Every word start of every spelling is a key, so "aviv" completes to
+    Tel Aviv. Each node keeps its AUTOCOMPLETE_MAX_RESULTS most popular
+    cities, so a lookup walks the prefix and reads a precomputed list:
+    O(prefix length) regardless of how many cities match.
+    """
+
+    def __init__(self, cities: Iterable[City]):
+        """Build from cities given most popular first"""
+        self._root = _TrieNode()
+        for city in cities:
+            for spelling in (city.english, city.hebrew, *city.aliases):
+                key = _normalize_prefix(spelling)
+                for start in [0] + [i + 1 for i, char in enumerate(key) if char == " "]:
+                    self._insert(key[start:], city)
+
+    def _insert(self, key: str, city: City):
+        node = self._root
+        self._add(node, city)
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            self._add(node, city)
+
+    @staticmethod
+    def _add(node: _TrieNode, city: City):
+        # Cities arrive in popularity order, so appending keeps each list ranked
+        if len(node.top) < AUTOCOMPLETE_MAX_RESULTS and city not in node.top:
+            node.top.append(city)
+
+    def complete(self, prefix: str, limit: int = AUTOCOMPLETE_MAX_RESULTS) -> List[City]:
+        """Most popular cities with a name (or word of a name) starting with prefix; all cities for an empty prefix"""
+        node = self._root
+        for char in _normalize_prefix(prefix):
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.top[:limit]
+
+
+_default_trie: Optional[CityTrie] = None
+
+
+def get_city_trie() -> CityTrie:
+    """Trie over every city in the registry, built on first use.
+
+    The registry lists cities by size and importance (major cities first),
+    which serves as their popularity ranking.
+    """
+    global _default_trie
+    if _default_trie is None:
+        _default_trie = CityTrie(CITIES)
+    return _default_trie
+
+
+def autocomplete_cities(query: str, limit: int = 8) -> List[City]:
+    """Cities for a typeahead: prefix completions, or fuzzy matches when nothing starts with the query"""
+    cities = get_city_trie().complete(query, limit)
+    if cities or not query.strip():
+        return cities
+    return [get_city(result.city) for result in get_city_index().search(query, limit)]
@@ -3,10 +3,10 @@ import plotly.express as px
 import pandas as pd
 from datetime import datetime
 
-from weather_api import WeatherAPI
+from forecast_matrix import ForecastMatrix
+from weather_api import UNIT_CELSIUS, UNIT_FAHRENHEIT, WeatherAPI
 from utils import (
     celsius_to_fahrenheit,
-    process_forecast_data,
     ISRAELI_CITIES,
     WEATHER_ICONS,
     search_cities
@@ -50,10 +50,23 @@ def show_comparison_dashboard():
         # Create comparison table
         st.markdown("## Current Weather Comparison")
         
+        # Fetch current weather and forecasts for all cities concurrently,
+        # one provider call per city where supported
+        cities = st.session_state.comparison_cities
+        bundle_results = weather_api.get_weather_bundle_many(cities)
+        for result in bundle_results:
+            if result.error is not None:
+                raise result.error
+
+        # Current conditions are cached by the bundles above; read them back as records
+        observations = weather_api.get_observations_many(cities)
+
         weather_data = []
-        for city in st.session_state.comparison_cities:
-            current = weather_api.get_current_weather(city)
-            temp = current['main']['temp']
+        for city, result in zip(cities, observations):
+            if result.error is not None:
+                raise result.error
+            observation = result.data
+            temp = observation.temperature
             if not use_celsius:
                 temp = celsius_to_fahrenheit(temp)
             
@@ -61,9 +74,9 @@ def show_comparison_dashboard():
                 'City': city,
                 'Temperature': temp,  # Store numeric values
                 'TemperatureDisplay': f"{temp:.1f}°{'C' if use_celsius else 'F'}",  # For display only
-                'Humidity': current['main']['humidity'],  # Store numeric values
-                'HumidityDisplay': f"{current['main']['humidity']}%",  # For display only
-                'Conditions': f"{WEATHER_ICONS.get(current['weather'][0]['icon'], '❓')} {current['weather'][0]['description']}"
+                'Humidity': observation.humidity,  # Store numeric values
+                'HumidityDisplay': f"{observation.humidity}%",  # For display only
+                'Conditions': f"{WEATHER_ICONS.get(observation.icon, '❓')} {observation.description}"
             })
         
         # Display comparison table
@@ -73,30 +86,18 @@ def show_comparison_dashboard():
         # Temperature comparison chart
         st.markdown("## Temperature Comparison")
         
-        # Collect forecast data for all cities
-        forecast_data = []
-        for city in st.session_state.comparison_cities:
-            city_forecast = weather_api.get_forecast(city)
-            df = process_forecast_data(city_forecast)
-            if not use_celsius:
-                df['temperature'] = df['temperature'].apply(celsius_to_fahrenheit)
-            df['city'] = city
-            forecast_data.append(df)
-        
-        # Combine all forecast data
-        combined_forecast = pd.concat(forecast_data, ignore_index=True)
+        # Align every city's forecast on one shared time axis (cities × time arrays)
+        matrix = ForecastMatrix.from_forecasts(cities, [result.data['forecast'] for result in bundle_results])
+        unit = UNIT_CELSIUS if use_celsius else UNIT_FAHRENHEIT
         
         # Create temperature trend chart
         fig = px.line(
-            combined_forecast,
-            x='datetime',
-            y='temperature',
-            color='city',
+            matrix.frame('temperature', unit),
             title=f"5-Day Temperature Forecast Comparison",
             labels={
                 'datetime': 'Date',
-                'temperature': f'Temperature (°{"C" if use_celsius else "F"})',
-                'city': 'City'
+                'value': f'Temperature (°{unit})',
+                'variable': 'City'
             }
         )
         st.plotly_chart(fig, use_container_width=True)
@@ -104,18 +105,30 @@ def show_comparison_dashboard():
         # Humidity comparison
         st.markdown("## Humidity Comparison")
         fig_humidity = px.line(
-            combined_forecast,
-            x='datetime',
-            y='humidity',
-            color='city',
+            matrix.frame('humidity'),
             title=f"5-Day Humidity Forecast Comparison",
             labels={
                 'datetime': 'Date',
-                'humidity': 'Humidity (%)',
-                'city': 'City'
+                'value': 'Humidity (%)',
+                'variable': 'City'
             }
         )
         st.plotly_chart(fig_humidity, use_container_width=True)
 
+        # How far apart the cities are, and which runs warmest
+        st.markdown("## Temperature Spread & Ranking")
+        fig_spread = px.area(
+            x=matrix.times,
+            y=matrix.spread('temperature', unit),
+            title="Temperature Spread Between Warmest and Coolest City",
+            labels={'x': 'Date', 'y': f'Spread (°{unit})'}
+        )
+        st.plotly_chart(fig_spread, use_container_width=True)
+
+        ranking = matrix.summary('temperature', unit).sort_values('average_rank')
+        ranking.columns = [f'Mean (°{unit})', f'Min (°{unit})', f'Max (°{unit})', 'Average Rank']
+        ranking.index.name = 'City'
+        st.table(ranking.round(1))
+
     except Exception as e:
         st.error(f"Error fetching weather data: {str(e)}")
@@ -0,0 +1,88 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils import FORECAST_TIMEZONE, celsius_to_fahrenheit
+from weather_api import UNIT_CELSIUS, UNIT_FAHRENHEIT
+from weather_models import forecast_columns
+
+# Forecast fields held by the matrix: name -> forecast_columns column
+MATRIX_FIELDS = {"temperature": "temp", "humidity": "humidity"}
+
+
+class ForecastMatrix:
+    """Forecasts for several cities aligned on one time axis.
+
+    Each field is a 2-D array of shape (cities, times). Cities whose
+    providers report on different grids (hourly vs 3-hourly) are
+    interpolated onto the coarsest grid over the window all of them cover.
+    """
+
+    def __init__(self, cities: List[str], times: np.ndarray, values: Dict[str, np.ndarray]):
+        self.cities = cities
+        self.times = times
+        self.values = values
+
+    @classmethod
+    def from_forecasts(cls, cities: Sequence[str], forecasts: Sequence[Dict]) -> "ForecastMatrix":
+        """Align get_forecast responses (one per city, in the same order) on a shared grid"""
+        columns = [forecast_columns(forecast) for forecast in forecasts]
+        columns = [column for column in columns if len(column["dt"]) > 1]
+        if len(columns) != len(cities):
+            raise ValueError("Every city needs a forecast with at least two time steps")
+
+        # Coarsest native step over the window every city covers
+        step = int(max(np.median(np.diff(column["dt"])) for column in columns))
+        start = max(int(column["dt"][0]) for column in columns)
+        end = min(int(column["dt"][-1]) for column in columns)
+        start += -start % step
+        grid = np.arange(start, end + 1, step, dtype=np.int64)
+
+        # Interpolate every city in one np.interp call: each city's time axis is shifted
+        # into its own disjoint span, so neighbouring cities never interpolate into each other
+        span = max(int(column["dt"][-1]) for column in columns) - min(int(column["dt"][0]) for column in columns) + step
+        offsets = np.arange(len(columns), dtype=np.int64) * span
+        x = np.concatenate([column["dt"] + offset for column, offset in zip(columns, offsets)])
+        targets = (grid[np.newaxis, :] + offsets[:, np.newaxis]).ravel()
+
+        values = {}
+        for field, source in MATRIX_FIELDS.items():
+            y = np.concatenate([np.asarray(column[source], dtype=np.float64) for column in columns])
+            values[field] = np.interp(targets, x, y).reshape(len(columns), len(grid)).astype(np.float32)
+
+        times = pd.to_datetime(grid, unit='s', utc=True).tz_convert(FORECAST_TIMEZONE).tz_localize(None)
+        return cls(list(cities), times.values, values)
+
+    def field(self, name: str, unit: str = UNIT_CELSIUS) -> np.ndarray:
+        """(cities, times) array of a field; temperatures in the requested unit"""
+        values = self.values[name]
+        if name == "temperature" and unit == UNIT_FAHRENHEIT:
+            values = celsius_to_fahrenheit(values)
+        return values
+
+    def frame(self, name: str, unit: str = UNIT_CELSIUS) -> pd.DataFrame:
+        """Wide DataFrame of a field: one row per time, one column per city"""
+        return pd.DataFrame(self.field(name, unit).T, index=pd.Index(self.times, name='datetime'), columns=self.cities)
+
+    def spread(self, name: str, unit: str = UNIT_CELSIUS) -> np.ndarray:
+        """Difference between the highest and lowest city at each time step"""
+        values = self.field(name, unit)
+        return values.max(axis=0) - values.min(axis=0)
+
+    def rank(self, name: str) -> np.ndarray:
+        """(cities, times) rank of each city at each time step, 1 being the highest value"""
+        order = np.argsort(-self.values[name], axis=0, kind='stable')
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.arange(1, len(self.cities) + 1)[:, np.newaxis], axis=0)
+        return ranks
+
+    def summary(self, name: str, unit: str = UNIT_CELSIUS) -> pd.DataFrame:
+        """Per-city mean, min, max and average rank of a field over the whole window"""
+        values = self.field(name, unit).astype(np.float64)
+        return pd.DataFrame({
+            'mean': values.mean(axis=1),
+            'min': values.min(axis=1),
+            'max': values.max(axis=1),
+            'average_rank': self.rank(name).mean(axis=1)
+        }, index=pd.Index(self.cities, name='city'))
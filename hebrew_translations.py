@@ -24,6 +24,11 @@ translations = {
     'select_from_favorites': 'בחר מהמועדפים',
     'no_favorites': 'אין ערים מועדפות עדיין. הוסף ערים למועדפים שלך.',
     'select_city': 'בחר עיר',
+    'search_city': 'חפש עיר',
+    'start_typing_city': 'התחל להקליד שם עיר',
+    'no_matching_cities': 'לא נמצאו ערים תואמות',
+    'nearby_cities': 'ערים סמוכות',
+    'km': 'ק"מ',
     'selected': 'נבחר',
     'weather_in': 'מזג האוויר ב',
     'israel': 'ישראל',
@@ -49,6 +54,13 @@ translations = {
     'humidity_comparison': 'השוואת לחות',
     'five_day_temperature_forecast': 'תחזית טמפרטורות לחמישה ימים',
     'five_day_humidity_forecast': 'תחזית לחות לחמישה ימים',
+    'temperature_spread_ranking': 'פיזור ודירוג טמפרטורות',
+    'temperature_spread': 'פער הטמפרטורות בין העיר החמה לקרירה ביותר',
+    'spread': 'פער',
+    'average': 'ממוצע',
+    'minimum': 'מינימום',
+    'maximum': 'מקסימום',
+    'average_rank': 'דירוג ממוצע',
     'humidity': 'לחות',
     'add_to_favorites': 'הוסף למועדפים',
     'added_to_favorites': 'נוסף למועדפים',
@@ -0,0 +1,232 @@
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from city_registry import city_key
+from utils import FORECAST_TIMEZONE
+from weather_models import Observation
+
+# Stored observation fields and their on-disk dtypes; "time" (epoch seconds) is always stored
+HISTORY_FIELDS = {
+    "temperature": np.float32,
+    "feels_like": np.float32,
+    "humidity": np.int8,
+    "pressure": np.float32,
+    "wind_speed": np.float32,
+    "wind_degree": np.int16,
+    "precipitation": np.float32,
+}
+
+# Seconds the writer buffers observations before flushing them, and the most it buffers
+# before flushing early
+HISTORY_FLUSH_INTERVAL = 30
+HISTORY_FLUSH_ROWS = 1000
+
+# A city/day partition with more segments than this is merged into one
+HISTORY_COMPACT_SEGMENTS = 32
+
+
+def _day(timestamp: int) -> str:
+    """UTC day partition of an epoch timestamp"""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _epoch(value) -> int:
+    """Epoch seconds of a datetime, Timestamp or number; naive times are taken as local (Israel) time"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    value = pd.Timestamp(value)
+    if value.tzinfo is None:
+        value = value.tz_localize(FORECAST_TIMEZONE)
+    return int(value.timestamp())
+
+
+class HistoryStore:
+    """Append-only history of current observations, stored column by column on disk.
+
+    Laid out as <root>/<city>/<UTC day>/<segment>/<field>.npy, one segment
+    per writer flush. Segment directories are named after the time range
+    they cover, so queries skip segments and partitions outside their window
+    and memory-map only the fields they ask for. Appends go to a queue that a
+    background thread flushes in batches, so callers never wait on disk.
+    """
+
+    def __init__(self, root: str, flush_interval: float = HISTORY_FLUSH_INTERVAL):
+        self.root = root
+        self.flush_interval = flush_interval
+        os.makedirs(root, exist_ok=True)
+
+        self._queue: "queue.Queue" = queue.Queue()
+        # Observation time last queued per city; providers repeat an observation until it updates
+        self._last_time: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="weather-history-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, city: str, current: Dict, fetched_at: Optional[float] = None):
+        """Queue a current weather response for writing; repeated observations are skipped"""
+        observation = Observation.from_response(city, current)
+        timestamp = int(current.get('dt') or fetched_at or time.time())
+        with self._lock:
+            if self._last_time.get(city) == timestamp:
+                return
+            self._last_time[city] = timestamp
+        self._queue.put((city, timestamp, [getattr(observation, field) for field in HISTORY_FIELDS]))
+
+    def flush(self):
+        """Block until every queued observation has been written"""
+        self._queue.join()
+
+    def history(
+        self,
+        city: str,
+        start=None,
+        end=None,
+        fields: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """Observations of a city between start and end (inclusive), oldest first.
+
+        Returns a DataFrame indexed by local (Israel) time with the requested
+        fields (default: all of HISTORY_FIELDS). Observations still queued
+        for writing are not included.
+        """
+        fields = list(HISTORY_FIELDS if fields is None else fields)
+        unknown = [field for field in fields if field not in HISTORY_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown history fields: {', '.join(unknown)}")
+
+        start = None if start is None else _epoch(start)
+        end = None if end is None else _epoch(end)
+        city_dir = os.path.join(self.root, city_key(city))
+        try:
+            days = sorted(os.listdir(city_dir))
+        except FileNotFoundError:
+            days = []
+        # Partition pruning on the directory names alone
+        if start is not None:
+            days = [day for day in days if day >= _day(start)]
+        if end is not None:
+            days = [day for day in days if day <= _day(end)]
+
+        parts = [self._read_partition(os.path.join(city_dir, day), start, end, fields) for day in days]
+        parts = [part for part in parts if part is not None]
+        if parts:
+            columns = {name: np.concatenate([part[name] for part in parts]) for name in ["time"] + fields}
+        else:
+            columns = {"time": np.empty(0, dtype=np.int64)}
+            columns.update({field: np.empty(0, dtype=HISTORY_FIELDS[field]) for field in fields})
+
+        # Compaction can briefly leave a merged segment next to its sources
+        times, first = np.unique(columns["time"], return_index=True)
+        index = pd.to_datetime(times, unit='s', utc=True).tz_convert(FORECAST_TIMEZONE).tz_localize(None)
+        return pd.DataFrame(
+            {field: columns[field][first] for field in fields},
+            index=pd.Index(index, name='time')
+        )
+
+    def _read_partition(
+        self,
+        path: str,
+        start: Optional[int],
+        end: Optional[int],
+        fields: List[str],
+        retry: bool = True
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """Read the requested fields of a partition's segments overlapping [start, end]"""
+        try:
+            segments = []
+            for name in sorted(os.listdir(path)):
+                if name.startswith("."):
+                    continue  # still being written
+                first, last = (int(part) for part in name.split("_")[:2])
+                if (start is not None and last < start) or (end is not None and first > end):
+                    continue
+                segment = os.path.join(path, name)
+                times = np.load(os.path.join(segment, "time.npy"), mmap_mode='r')
+                mask = np.ones(len(times), dtype=bool)
+                if start is not None:
+                    mask &= times >= start
+                if end is not None:
+                    mask &= times <= end
+                segments.append({
+                    column: np.load(os.path.join(segment, f"{column}.npy"), mmap_mode='r')[mask]
+                    for column in ["time"] + fields
+                })
+        except FileNotFoundError:
+            # A compaction replaced the segments while they were listed; read the partition again
+            if retry:
+                return self._read_partition(path, start, end, fields, retry=False)
+            return None
+
+        if not segments:
+            return None
+        return {column: np.concatenate([segment[column] for segment in segments]) for column in segments[0]}
+
+    def _run(self):
+        """Writer thread: collect queued observations and flush them in batches"""
+        while True:
+            rows = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < HISTORY_FLUSH_ROWS:
+                try:
+                    rows.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                self._write(rows)
+            except OSError:
+                # History is best-effort; never take the writer down over a full or read-only disk
+                pass
+            finally:
+                for _ in rows:
+                    self._queue.task_done()
+
+    def _write(self, rows: List):
+        """Write a batch as one new segment per city/day partition"""
+        partitions: Dict[str, List] = {}
+        for city, timestamp, values in rows:
+            path = os.path.join(self.root, city_key(city), _day(timestamp))
+            partitions.setdefault(path, []).append((timestamp, values))
+
+        for path, partition_rows in partitions.items():
+            partition_rows.sort(key=lambda row: row[0])
+            columns = {"time": np.array([row[0] for row in partition_rows], dtype=np.int64)}
+            for i, (field, dtype) in enumerate(HISTORY_FIELDS.items()):
+                columns[field] = np.array([row[1][i] for row in partition_rows], dtype=np.float64).astype(dtype)
+            self._write_segment(path, columns)
+
+            if len(os.listdir(path)) > HISTORY_COMPACT_SEGMENTS:
+                self._compact(path)
+
+    def _write_segment(self, path: str, columns: Dict[str, np.ndarray]) -> str:
+        """Write one segment under a hidden name, then rename it into place so readers never see it half-written"""
+        name = f"{columns['time'][0]}_{columns['time'][-1]}_{time.time_ns()}"
+        tmp = os.path.join(path, f".{name}")
+        os.makedirs(tmp)
+        for column, values in columns.items():
+            np.save(os.path.join(tmp, f"{column}.npy"), values)
+        os.rename(tmp, os.path.join(path, name))
+        return name
+
+    def _compact(self, path: str):
+        """Merge a partition's segments into one, dropping repeated observations"""
+        names = [name for name in os.listdir(path) if not name.startswith(".")]
+        segments = [
+            {column: np.load(os.path.join(path, name, f"{column}.npy")) for column in ["time", *HISTORY_FIELDS]}
+            for name in names
+        ]
+        times, first = np.unique(np.concatenate([segment["time"] for segment in segments]), return_index=True)
+        columns = {"time": times}
+        for field in HISTORY_FIELDS:
+            columns[field] = np.concatenate([segment[field] for segment in segments])[first]
+
+        self._write_segment(path, columns)
+        for name in names:
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
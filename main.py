@@ -1,19 +1,19 @@
 import streamlit as st
 import plotly.express as px
 from datetime import datetime
-import pandas as pd
 import json
-from weather_api import WeatherAPI
+from weather_api import PRIORITY_LOW, UNIT_CELSIUS, UNIT_FAHRENHEIT, WeatherAPI
 from utils import (
     celsius_to_fahrenheit,
-    process_forecast_data,
-    ISRAELI_CITIES,
     WEATHER_ICONS,
     search_cities
 )
 from styles import apply_custom_styles
 from comparison_dashboard import show_comparison_dashboard
-from wind_visualization import create_wind_overlay, get_city_coordinates # Added import
+from wind_visualization import create_wind_overlay, get_city_coordinates, get_selected_city
+from spatial_index import get_spatial_index
+from weather_refresher import start_refresher
+from city_search import autocomplete_cities
 
 def main():
     # Page config is now set in app.py
@@ -21,6 +21,9 @@ def main():
     # Apply custom styles
     apply_custom_styles()
 
+    # Keep the national weather snapshot warm in the background (started once per process)
+    refresher = start_refresher()
+
 # Navigation
     st.sidebar.title("Navigation")
     page = st.sidebar.radio("Select View", ["Single City Weather", "City Comparison"])
@@ -58,13 +61,13 @@ def main():
             if selected_favorite:
                 selected_city = selected_favorite
 
-        # City selection
-        selected_city = st.sidebar.selectbox(
-            "Select City",
-            ISRAELI_CITIES,
-            key="city_selector",
-            index=ISRAELI_CITIES.index("Jerusalem") if "Jerusalem" in ISRAELI_CITIES else 0
-        )
+        # City selection: type to narrow the list to the top matches
+        city_query = st.sidebar.text_input("Search City", key="city_search", placeholder="Start typing a city name")
+        matches = [city.english for city in autocomplete_cities(city_query)]
+        if not matches:
+            st.sidebar.info("No matching cities")
+            matches = ["Jerusalem"]
+        selected_city = st.sidebar.selectbox("Select City", matches, key="city_selector")
 
     # Favorite toggle button
     col1, col2 = st.sidebar.columns([3, 1])
@@ -90,9 +93,11 @@ def main():
     st.title(f"Weather in {selected_city}, Israel 🌤️")
 
     try:
-        # Current weather
+        # Current weather and forecast, from a single provider call where supported
         with st.spinner("Fetching current weather..."):
-            current_weather = weather_api.get_current_weather(selected_city)
+            weather_bundle = weather_api.get_weather_bundle(selected_city)
+            current_weather = weather_bundle['current']
+            weather_api.prefetch_nearby(selected_city)
 
         # Display current weather
         col1, col2, col3 = st.columns(3)
@@ -126,44 +131,39 @@ def main():
         # Get multiple cities for comprehensive AR visualization
         city_coords = get_city_coordinates()
         
-        # Enhance city data with weather information for AR overlay
-        enhanced_cities = []
-        for city_data in city_coords:
-            try:
-                # Get weather data for each city
-                if city_data['city'] == selected_city:
-                    # Use already fetched data for selected city
-                    city_weather = current_weather
-                else:
-                    # Fetch weather for other cities
-                    city_weather = weather_api.get_current_weather(city_data['city'])
-                
-                # Add weather data to city coordinates
-                enhanced_city = city_data.copy()
-                enhanced_city['wind_speed'] = city_weather.get('wind', {}).get('speed', 0)
-                enhanced_city['wind_degree'] = city_weather.get('wind', {}).get('deg', 0)
-                enhanced_city['wind_direction'] = city_weather.get('wind', {}).get('direction', 'N')
-                enhanced_city['temperature'] = city_weather.get('main', {}).get('temp', 20)
-                enhanced_city['humidity'] = city_weather.get('main', {}).get('humidity', 50)
-                
-                # Add precipitation data (rain or snow)
-                precipitation = 0
-                if 'rain' in city_weather:
-                    precipitation = city_weather['rain'].get('1h', 0)
-                elif 'snow' in city_weather:
-                    precipitation = city_weather['snow'].get('1h', 0)
-                enhanced_city['precipitation'] = precipitation
-                
-                enhanced_cities.append(enhanced_city)
-                
-            except Exception as e:
+        # Read overlay cities from the background snapshot, fetching only cities it lacks;
+        # these are low priority so they're shed before the selected city's requests
+        city_results = refresher.get_observations_many(
+            [city_data['city'] for city_data in city_coords],
+            weather_api,
+            PRIORITY_LOW
+        )
+
+        # Keep the cities we have weather for, labelled for the map
+        observations = []
+        labels = []
+        for city_data, result in zip(city_coords, city_results):
+            if result.error is not None:
                 # If we can't get weather for a city, skip it
                 continue
-        
-        if enhanced_cities:
+            observations.append(result.data)
+            labels.append(city_data['hebrew_city'])
+
+        if observations:
             # Create AR overlay with wind arrows and precipitation
-            wind_fig = create_wind_overlay(enhanced_cities)
-            st.plotly_chart(wind_fig, use_container_width=True, key="ar_overlay")
+            wind_fig = create_wind_overlay(observations, labels)
+            wind_event = st.plotly_chart(
+                wind_fig, use_container_width=True, key="ar_overlay", on_select="rerun", selection_mode="points"
+            )
+
+            # Resolve a click on the map to the nearest city and its neighbors
+            clicked_city = get_selected_city(wind_event)
+            if clicked_city is not None:
+                neighbors = get_spatial_index().neighbors(clicked_city, 3)
+                st.info(
+                    f"📍 **{clicked_city.english}** ({clicked_city.region}) · Nearby: "
+                    + ", ".join(f"{city.english} ({distance:.0f} km)" for city, distance in neighbors)
+                )
             
             # Enhanced AR info panel
             col1, col2 = st.columns([2, 1])
@@ -182,13 +182,13 @@ def main():
             with col2:
                 # Real-time weather stats
                 st.markdown("**Live Weather Stats:**")
-                avg_wind = sum(city.get('wind_speed', 0) for city in enhanced_cities) / len(enhanced_cities)
-                active_precipitation = sum(1 for city in enhanced_cities if city.get('precipitation', 0) > 0)
+                avg_wind = sum(observation.wind_speed for observation in observations) / len(observations)
+                active_precipitation = sum(1 for observation in observations if observation.precipitation > 0)
                 st.metric("Avg Wind Speed", f"{avg_wind:.1f} km/h")
                 st.metric("Precipitation Zones", f"{active_precipitation} cities")
                 
                 # Weather intensity indicator
-                max_wind = max(city.get('wind_speed', 0) for city in enhanced_cities)
+                max_wind = max(observation.wind_speed for observation in observations)
                 if max_wind > 15:
                     st.warning("⚠️ High Wind Alert")
                 elif active_precipitation > 2:
@@ -201,12 +201,9 @@ def main():
 
         # Forecast
         st.markdown("## 5-Day Forecast")
-        with st.spinner("Fetching forecast data..."):
-            forecast_data = weather_api.get_forecast(selected_city)
-            df = process_forecast_data(forecast_data)
-
-        if not use_celsius:
-            df['temperature'] = df['temperature'].apply(celsius_to_fahrenheit)
+        # Built once per forecast fetch and unit, and shared between sessions; never modify it in place
+        unit = UNIT_CELSIUS if use_celsius else UNIT_FAHRENHEIT
+        df = weather_api.get_forecast_frame(selected_city, unit=unit)
 
         # Create temperature trend chart
         fig = px.line(
@@ -228,24 +225,23 @@ def main():
         # Daily forecast cards
         st.markdown("### Daily Details")
         
-        # Group by day and calculate numeric column means
-        numeric_cols = ['temperature', 'humidity']
-        daily_forecast = df.copy()
-        daily_forecast['date'] = daily_forecast['datetime'].dt.date
-        daily_means = daily_forecast.groupby('date')[numeric_cols].mean().reset_index()
-        
-        # Add datetime back for display
-        daily_means['datetime'] = pd.to_datetime(daily_means['date'])
-        
-        for _, row in daily_means.iterrows():
-            with st.container():
-                st.markdown(f"""
-                    <div class="weather-card">
-                        <h4>{row['datetime'].strftime('%A, %B %d')}</h4>
-                        <p>Temperature: {row['temperature']:.1f}°{'C' if use_celsius else 'F'}</p>
-                        <p>Humidity: {row['humidity']:.0f}%</p>
-                    </div>
-                """, unsafe_allow_html=True)
+        # Per-day summary computed once per forecast fetch; rendered as a single block
+        daily = weather_api.get_daily_summary(selected_city, unit=unit)
+
+        cards = "".join(
+            f"""
+                <div class="weather-card">
+                    <h4>{date.strftime('%A, %B %d')}</h4>
+                    <p>{WEATHER_ICONS.get(icon, '❓')} {description.capitalize()}</p>
+                    <p>Temperature: {temp_mean:.1f}°{unit} ({temp_min:.0f}° – {temp_max:.0f}°)</p>
+                    <p>Humidity: {humidity:.0f}%</p>
+                </div>"""
+            for date, temp_min, temp_mean, temp_max, humidity, description, icon in zip(
+                daily.index, daily['temp_min'], daily['temp_mean'], daily['temp_max'],
+                daily['humidity'], daily['description'], daily['icon']
+            )
+        )
+        st.markdown(cards, unsafe_allow_html=True)
 
     except Exception as e:
         st.error(f"Error fetching weather data: {str(e)}")
@@ -1,19 +1,20 @@
 import streamlit as st
 import plotly.express as px
 from datetime import datetime
-import pandas as pd
 import json
-from weather_api import WeatherAPI
+from weather_api import PRIORITY_LOW, UNIT_CELSIUS, UNIT_FAHRENHEIT, WeatherAPI
 from utils import (
     celsius_to_fahrenheit,
-    process_forecast_data,
-    ISRAELI_CITIES,
     WEATHER_ICONS,
     search_cities
 )
 from styles import apply_custom_styles
 from comparison_dashboard_hebrew import show_comparison_dashboard
-from wind_visualization import create_wind_overlay, get_city_coordinates
+from wind_visualization import create_wind_overlay, get_city_coordinates, get_selected_city
+from spatial_index import get_spatial_index
+from weather_refresher import start_refresher
+from city_registry import canonical_city_name
+from city_search import autocomplete_cities
 from hebrew_translations import translations
 
 def main():
@@ -22,6 +23,9 @@ def main():
     # Apply custom styles
     apply_custom_styles()
 
+    # Keep the national weather snapshot warm in the background (started once per process)
+    refresher = start_refresher()
+
     # Navigation
     st.sidebar.title(translations["navigation"])
     page = st.sidebar.radio(translations["select_view"], [translations["single_city_weather"], translations["city_comparison"]])
@@ -59,150 +63,13 @@ def main():
         else:
             st.sidebar.info(translations["no_favorites"])
 
-        # Hebrew city translations - comprehensive list
-        city_translations = {
-            "Jerusalem": "ירושלים",
-            "Tel Aviv": "תל אביב",
-            "Haifa": "חיפה",
-            "Rishon LeZion": "ראשון לציון",
-            "Petah Tikva": "פתח תקווה",
-            "Ashdod": "אשדוד",
-            "Netanya": "נתניה",
-            "Be'er Sheva": "באר שבע",
-            "Beer Sheva": "באר שבע",
-            "Beersheba": "באר שבע",
-            "Holon": "חולון",
-            "Ramat Gan": "רמת גן",
-            "Herzliya": "הרצליה",
-            "Rehovot": "רחובות",
-            "Bat Yam": "בת ים",
-            "Ashkelon": "אשקלון",
-            "Kfar Saba": "כפר סבא",
-            "Ra'anana": "רעננה",
-            "Modiin": "מודיעין",
-            "Nahariya": "נהריה",
-            "Lod": "לוד",
-            "Givatayim": "גבעתיים",
-            "Eilat": "אילת",
-            "Nazareth": "נצרת",
-            "Tiberias": "טבריה",
-            "Safed": "צפת",
-            "Acre": "עכו",
-            "Hadera": "חדרה",
-            "Beit Shemesh": "בית שמש",
-            "Bnei Brak": "בני ברק",
-            "Karmiel": "כרמיאל",
-            "Kiryat Ata": "קרית אתא",
-            "Kiryat Bialik": "קרית ביאליק",
-            "Kiryat Gat": "קרית גת",
-            "Kiryat Malakhi": "קרית מלאכי",
-            "Kiryat Motzkin": "קרית מוצקין",
-            "Kiryat Ono": "קרית אונו",
-            "Kiryat Shmona": "קרית שמונה",
-            "Kiryat Yam": "קרית ים",
-            "Kiryat Haim": "קרית חיים",
-            "Ma'alot-Tarshiha": "מעלות-תרשיחא",
-            "Maale Adumim": "מעלה אדומים",
-            "Migdal HaEmek": "מגדל העמק",
-            "Nof HaGalil": "נוף הגליל",
-            "Or Akiva": "אור עקיבא",
-            "Or Yehuda": "אור יהודה",
-            "Pardes Hanna-Karkur": "פרדס חנה-כרכור",
-            "Qalansawe": "קלנסווה",
-            "Raanana": "רעננה",
-            "Ramla": "רמלה",
-            "Rosh HaAyin": "ראש העין",
-            "Sakhnin": "סח'נין",
-            "Sderot": "שדרות",
-            "Shfaram": "שפרעם",
-            "Taibe": "טייבה",
-            "Tamra": "טמרה",
-            "Tayibe": "טייבה",
-            "Tira": "טירה",
-            "Tirat Carmel": "טירת כרמל",
-            "Umm al-Fahm": "אום אל-פחם",
-            "Yavne": "יבנה",
-            "Yehud": "יהוד",
-            "Yokneam": "יקנעם",
-            "Zichron Yaakov": "זכרון יעקב",
-            "Arad": "ערד",
-            "Dimona": "דימונה",
-            "Ofakim": "אופקים",
-            "Netivot": "נתיבות",
-            "Mitzpe Ramon": "מצפה רמון",
-            "Yeroham": "ירוחם",
-            "Rahat": "רהט",
-            "Ariel": "אריאל",
-            "Beitar Illit": "ביתר עילית",
-            "Modiin Illit": "מודיעין עילית",
-            "Efrat": "אפרת",
-            "Kiryat Arba": "קרית ארבע",
-            "Kochav Yaakov": "כוכב יעקב",
-            "Beit El": "בית אל",
-            "Kedumim": "קדומים",
-            "Karnei Shomron": "קרני שומרון",
-            "Elkana": "אלקנה",
-            "Oranit": "אורנית",
-            "Alfei Menashe": "אלפי מנשה",
-            "Nesher": "נשר",
-            "Kiryat Tivon": "קרית טבעון",
-            "Rosh Pina": "ראש פינה",
-            "Metula": "מטולה",
-            "Afula": "עפולה",
-            "Ramat HaSharon": "רמת השרון",
-            "Hod HaSharon": "הוד השרון",
-            "Ness Ziona": "נס ציונה",
-            "Ganei Tikva": "גני תקווה",
-            "Shoham": "שוהם",
-            "Even Yehuda": "אבן יהודה",
-            "Kadima-Zoran": "קדימה-צורן",
-            "Tel Mond": "תל מונד",
-            "Kfar Yona": "כפר יונה",
-            "Givat Shmuel": "גבעת שמואל",
-            "Binyamina": "בנימינה",
-            "Givat Ada": "גבעת עדה",
-            "Karkur": "כרכור",
-            "Caesarea": "קיסריה",
-            "Bat Hefer": "בת חפר",
-            "Ein Iron": "עין איירון",
-            "Beer Yaakov": "באר יעקב",
-            "Kuseife": "כוסייפה",
-            "Tel Sheva": "תל שבע",
-            "Lehavim": "להבים",
-            "Meitar": "מיתר",
-            "Omer": "עומר",
-            "Yeruham": "ירוחם",
-            "Majd al-Krum": "מג'ד אל-כרום",
-            "Maghar": "מגאר",
-            "Arraba": "עראבה",
-            "I'billin": "אעבלין",
-            "Kafr Kanna": "כפר כנא",
-            "Yafa an-Naseriyye": "יאפא א-נאצרה",
-            "Julis": "ג'וליס",
-            "Abu Sinan": "אבו סנאן",
-            "Jadeidi-Makr": "ג'דיידה-מכר"
-        }
-
-        # Create list of Hebrew city names
-        hebrew_cities = []
-        english_to_hebrew = {}
-        hebrew_to_english = {}
-
-        for city in ISRAELI_CITIES:
-            if city in city_translations:
-                hebrew_cities.append(city_translations[city])
-                english_to_hebrew[city] = city_translations[city]
-                hebrew_to_english[city_translations[city]] = city
-            else:
-                hebrew_cities.append(city)
-
-        # City selection
-        selected_city = st.sidebar.selectbox(
-            translations["select_city"],
-            sorted(hebrew_cities),
-            key="city_selector",
-            index=hebrew_cities.index("ירושלים") if "ירושלים" in hebrew_cities else 0
-        )
+        # City selection by Hebrew name: type to narrow the list to the top matches
+        city_query = st.sidebar.text_input(translations["search_city"], key="city_search", placeholder=translations["start_typing_city"])
+        matches = [city.hebrew for city in autocomplete_cities(city_query)]
+        if not matches:
+            st.sidebar.info(translations["no_matching_cities"])
+            matches = ["ירושלים"]
+        selected_city = st.sidebar.selectbox(translations["select_city"], matches, key="city_selector")
 
         # Favorite toggle button
         col1, col2 = st.sidebar.columns([3, 1])
@@ -230,9 +97,7 @@ def main():
         try:
             if selected_city:
                 # Convert Hebrew city name to English for API call
-                english_city = selected_city
-                if selected_city in hebrew_to_english:
-                    english_city = hebrew_to_english[selected_city]
+                english_city = canonical_city_name(selected_city)
 
                 # Show weather for selected city
                 st.markdown(f"# {WEATHER_ICONS.get('02d', '☀️')} {translations['weather_in']} {selected_city}, {translations['israel']}")
@@ -244,9 +109,12 @@ def main():
                         st.success(f"{selected_city} {translations['added_to_favorites']}!")
                         st.rerun()
 
-                # Get current weather using English city name
+                # Get current weather and forecast using English city name,
+                # from a single provider call where supported
                 with st.spinner(translations["fetching_current_weather"]):
-                    current_weather = weather_api.get_current_weather(english_city)
+                    weather_bundle = weather_api.get_weather_bundle(english_city)
+                    current_weather = weather_bundle['current']
+                    weather_api.prefetch_nearby(english_city)
 
             # Display current weather
             col1, col2, col3 = st.columns(3)
@@ -280,44 +148,40 @@ def main():
             # Get multiple cities for comprehensive AR visualization
             city_coords = get_city_coordinates()
 
-            # Enhance city data with weather information for AR overlay
-            enhanced_cities = []
-            for city_data in city_coords:
-                try:
-                    # Get weather data for each city
-                    if city_data.get('hebrew_city') == selected_city:
-                        # Use already fetched data for selected city
-                        city_weather = current_weather
-                    else:
-                        # Fetch weather for other cities using English names
-                        city_weather = weather_api.get_current_weather(city_data['city'])
-
-                    # Add weather data to city coordinates
-                    enhanced_city = city_data.copy()
-                    enhanced_city['wind_speed'] = city_weather.get('wind', {}).get('speed', 0)
-                    enhanced_city['wind_degree'] = city_weather.get('wind', {}).get('deg', 0)
-                    enhanced_city['wind_direction'] = city_weather.get('wind', {}).get('direction', 'N')
-                    enhanced_city['temperature'] = city_weather.get('main', {}).get('temp', 20)
-                    enhanced_city['humidity'] = city_weather.get('main', {}).get('humidity', 50)
-
-                    # Add precipitation data (rain or snow)
-                    precipitation = 0
-                    if 'rain' in city_weather:
-                        precipitation = city_weather['rain'].get('1h', 0)
-                    elif 'snow' in city_weather:
-                        precipitation = city_weather['snow'].get('1h', 0)
-                    enhanced_city['precipitation'] = precipitation
-
-                    enhanced_cities.append(enhanced_city)
-
-                except Exception as e:
+            # Read overlay cities from the background snapshot using English names,
+            # fetching only cities it lacks; these are low priority so they're shed
+            # before the selected city's requests
+            city_results = refresher.get_observations_many(
+                [city_data['city'] for city_data in city_coords],
+                weather_api,
+                PRIORITY_LOW
+            )
+
+            # Keep the cities we have weather for, labelled for the map
+            observations = []
+            labels = []
+            for city_data, result in zip(city_coords, city_results):
+                if result.error is not None:
                     # If we can't get weather for a city, skip it
                     continue
+                observations.append(result.data)
+                labels.append(city_data['hebrew_city'])
 
-            if enhanced_cities:
+            if observations:
                 # Create AR overlay with wind arrows and precipitation
-                wind_fig = create_wind_overlay(enhanced_cities)
-                st.plotly_chart(wind_fig, use_container_width=True, key="ar_overlay_hebrew")
+                wind_fig = create_wind_overlay(observations, labels)
+                wind_event = st.plotly_chart(
+                    wind_fig, use_container_width=True, key="ar_overlay_hebrew", on_select="rerun", selection_mode="points"
+                )
+
+                # Resolve a click on the map to the nearest city and its neighbors
+                clicked_city = get_selected_city(wind_event)
+                if clicked_city is not None:
+                    neighbors = get_spatial_index().neighbors(clicked_city, 3)
+                    st.info(
+                        f"📍 **{clicked_city.hebrew}** · {translations['nearby_cities']}: "
+                        + ", ".join(f"{city.hebrew} ({distance:.0f} {translations['km']})" for city, distance in neighbors)
+                    )
 
                 # Enhanced AR info panel
                 col1, col2 = st.columns([2, 1])
@@ -336,13 +200,13 @@ def main():
                 with col2:
                     # Real-time weather stats
                     st.markdown("**סטטיסטיקות מזג אוויר חיות:**")
-                    avg_wind = sum(city.get('wind_speed', 0) for city in enhanced_cities) / len(enhanced_cities)
-                    active_precipitation = sum(1 for city in enhanced_cities if city.get('precipitation', 0) > 0)
+                    avg_wind = sum(observation.wind_speed for observation in observations) / len(observations)
+                    active_precipitation = sum(1 for observation in observations if observation.precipitation > 0)
                     st.metric("מהירות רוח ממוצעת", f"{avg_wind:.1f} קמ\"ש")
                     st.metric("אזורי משקעים", f"{active_precipitation} ערים")
 
                     # Weather intensity indicator
-                    max_wind = max(city.get('wind_speed', 0) for city in enhanced_cities)
+                    max_wind = max(observation.wind_speed for observation in observations)
                     if max_wind > 15:
                         st.warning("⚠️ התרעת רוח חזקה")
                     elif active_precipitation > 2:
@@ -354,13 +218,9 @@ def main():
 
             # Forecast
             st.markdown(f"## {translations['five_day_forecast']}")
-            # Get 5-day forecast using English city name
-            with st.spinner(translations["fetching_forecast_data"]):
-                forecast_data = weather_api.get_forecast(english_city)
-                df = process_forecast_data(forecast_data)
-
-            if not use_celsius:
-                df['temperature'] = df['temperature'].apply(celsius_to_fahrenheit)
+            # Built once per forecast fetch and unit, and shared between sessions; never modify it in place
+            unit = UNIT_CELSIUS if use_celsius else UNIT_FAHRENHEIT
+            df = weather_api.get_forecast_frame(english_city, unit=unit)
 
             # Create temperature trend chart
             fig = px.line(
@@ -382,14 +242,8 @@ def main():
             # Daily forecast cards
             st.markdown(f"### {translations['daily_details']}")
 
-            # Group by day and calculate numeric column means
-            numeric_cols = ['temperature', 'humidity']
-            daily_forecast = df.copy()
-            daily_forecast['date'] = daily_forecast['datetime'].dt.date
-            daily_means = daily_forecast.groupby('date')[numeric_cols].mean().reset_index()
-
-            # Add datetime back for display
-            daily_means['datetime'] = pd.to_datetime(daily_means['date'])
+            # Per-day summary computed once per forecast fetch; rendered as a single block
+            daily = weather_api.get_daily_summary(english_city, unit=unit)
 
             # Hebrew day and month names
             hebrew_days = {
@@ -417,24 +271,23 @@ def main():
                 'December': 'דצמבר'
             }
 
-            for _, row in daily_means.iterrows():
-                # Get English format first
-                english_day = row['datetime'].strftime('%A')
-                english_month = row['datetime'].strftime('%B')
-                day_num = row['datetime'].strftime('%d')
-
-                # Convert to Hebrew
-                hebrew_day = hebrew_days.get(english_day, english_day)
-                hebrew_month = hebrew_months.get(english_month, english_month)
-
-                with st.container():
-                    st.markdown(f"""
-                        <div class="weather-card">
-                            <h4>{hebrew_day}, {hebrew_month} {day_num}</h4>
-                            <p>{translations['temperature']}: {row['temperature']:.1f}°{'C' if use_celsius else 'F'}</p>
-                            <p>{translations['humidity']}: {row['humidity']:.0f}%</p>
-                        </div>
-                    """, unsafe_allow_html=True)
+            day_names = daily.index.day_name().map(hebrew_days)
+            month_names = daily.index.month_name().map(hebrew_months)
+
+            cards = "".join(
+                f"""
+                    <div class="weather-card">
+                        <h4>{day_name}, {month_name} {date.day:02d}</h4>
+                        <p>{WEATHER_ICONS.get(icon, '❓')} {description.capitalize()}</p>
+                        <p>{translations['temperature']}: {temp_mean:.1f}°{unit} ({temp_min:.0f}° – {temp_max:.0f}°)</p>
+                        <p>{translations['humidity']}: {humidity:.0f}%</p>
+                    </div>"""
+                for date, day_name, month_name, temp_min, temp_mean, temp_max, humidity, description, icon in zip(
+                    daily.index, day_names, month_names, daily['temp_min'], daily['temp_mean'], daily['temp_max'],
+                    daily['humidity'], daily['description'], daily['icon']
+                )
+            )
+            st.markdown(cards, unsafe_allow_html=True)
 
         except Exception as e:
             st.error(f"{translations['error_fetching_weather']}: {str(e)}")
@@ -0,0 +1,147 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rows are kept this many seconds past expiry, so a restarted server still has
+# recent data to serve while it refreshes (WeatherAPI passes its stale TTL)
+PERSISTENT_RETENTION = 60 * 60
+
+# Expired rows are deleted this many at a time, so pruning never holds the write lock for long
+PRUNE_BATCH_SIZE = 500
+
+# Minimum seconds between pruning passes
+PRUNE_INTERVAL = 10 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    provider TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    city TEXT NOT NULL,
+    value TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (provider, endpoint, city)
+)
+"""
+
+
+def _to_json(value):
+    """Serialize the numpy arrays of columnar forecasts as plain lists"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class PersistentCache:
+    """SQLite-backed store of normalized API responses that survives restarts.
+
+    Sits under the in-memory ResponseCache. Uses WAL mode so page threads
+    can read while another thread writes; each thread gets its own
+    connection. The database is opened on first use; if it can't be (an
+    unwritable path, a locked file) the store disables itself and every
+    lookup misses, since it must never fail a request.
+    """
+
+    def __init__(self, path: str, retention: float = PERSISTENT_RETENTION):
+        self.path = path
+        self.retention = retention
+        self.disabled = False
+        self._local = threading.local()
+        self._last_prune = 0.0
+        self._prune_lock = threading.Lock()
+        self._opened = False
+        self._open_lock = threading.Lock()
+
+    def _open(self) -> bool:
+        """Create the schema on first use; False if the store is (now) disabled"""
+        if self._opened:
+            return True
+        with self._open_lock:
+            if self.disabled:
+                return False
+            if not self._opened:
+                try:
+                    conn = self._connection()
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(_SCHEMA)
+                    conn.execute("CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)")
+                    conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning("Persistent weather cache %s disabled: %s", self.path, e)
+                    self.disabled = True
+                    return False
+                self._opened = True
+        self.prune()
+        return True
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[Tuple[Dict, float, float]]:
+        """Return (value, fetched_at, expires_at) for a cache key, or None if missing or past retention"""
+        if not self._open():
+            return None
+        try:
+            row = self._connection().execute(
+                "SELECT value, fetched_at, expires_at FROM responses"
+                " WHERE provider = ? AND endpoint = ? AND city = ? AND expires_at >= ?",
+                (*key, time.time() - self.retention)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+
+    def set(self, key: Tuple[str, str, str], value: Dict, fetched_at: float, expires_at: float):
+        """Store a response, replacing any previous one for the key"""
+        if not self._open():
+            return
+        try:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (provider, endpoint, city, value, fetched_at, expires_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (*key, json.dumps(value, default=_to_json), fetched_at, expires_at)
+            )
+            conn.commit()
+        except sqlite3.Error:
+            # The on-disk copy is only a warm-start aid; never fail a request over it
+            return
+
+        if time.time() - self._last_prune >= PRUNE_INTERVAL:
+            self.prune()
+
+    def prune(self) -> int:
+        """Delete rows past their retention window in small batches; returns rows deleted"""
+        if not self._prune_lock.acquire(blocking=False):
+            return 0
+        try:
+            self._last_prune = time.time()
+            cutoff = self._last_prune - self.retention
+            conn = self._connection()
+            deleted = 0
+            while True:
+                cursor = conn.execute(
+                    "DELETE FROM responses WHERE rowid IN"
+                    " (SELECT rowid FROM responses WHERE expires_at < ? LIMIT ?)",
+                    (cutoff, PRUNE_BATCH_SIZE)
+                )
+                conn.commit()
+                deleted += cursor.rowcount
+                if cursor.rowcount < PRUNE_BATCH_SIZE:
+                    return deleted
+        except sqlite3.Error:
+            return 0
+        finally:
+            self._prune_lock.release()
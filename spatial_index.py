@@ -0,0 +1,114 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from city_registry import CITIES, City
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # optional: KD-tree queries; the brute-force fallback is fine for a few hundred cities
+    cKDTree = None
+
+# Mean Earth radius, km
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _to_xyz(lat, lon) -> np.ndarray:
+    """Points on a sphere of EARTH_RADIUS_KM, shape (n, 3), for arrays of degrees.
+
+    Straight-line (chord) distance between these points orders exactly like
+    great-circle distance, so a Euclidean KD-tree gives true nearest cities.
+    """
+    lat = np.radians(np.asarray(lat, dtype=np.float64)).ravel()
+    lon = np.radians(np.asarray(lon, dtype=np.float64)).ravel()
+    cos_lat = np.cos(lat)
+    return EARTH_RADIUS_KM * np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def _chord_to_km(chord: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km for chord lengths on the Earth sphere"""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / (2 * EARTH_RADIUS_KM), 0.0, 1.0))
+
+
+def _km_to_chord(km: float) -> float:
+    """Chord length on the Earth sphere spanning a great-circle distance in km"""
+    return 2 * EARTH_RADIUS_KM * np.sin(min(km / (2 * EARTH_RADIUS_KM), np.pi / 2))
+
+
+class CitySpatialIndex:
+    """Nearest-city and radius lookups over city coordinates.
+
+    Queries take scalars or arrays of latitudes/longitudes and are answered
+    for all points at once, through scipy's cKDTree when it is installed
+    and a vectorized NumPy distance matrix otherwise. Distances are
+    great-circle kilometres.
+    """
+
+    def __init__(self, cities: Sequence[City]):
+        self.cities: Tuple[City, ...] = tuple(cities)
+        self._points = _to_xyz([city.lat for city in self.cities], [city.lon for city in self.cities])
+        self._tree = cKDTree(self._points) if cKDTree is not None else None
+
+    def __len__(self) -> int:
+        return len(self.cities)
+
+    def nearest(self, lat, lon, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """(distances_km, indices) of the k nearest cities to each point, each of shape (points, k), nearest first"""
+        queries = _to_xyz(lat, lon)
+        k = max(1, min(k, len(self.cities)))
+
+        if self._tree is not None:
+            chords, indices = self._tree.query(queries, k=k)
+            chords, indices = chords.reshape(len(queries), k), indices.reshape(len(queries), k)
+        else:
+            chords = np.linalg.norm(queries[:, np.newaxis, :] - self._points[np.newaxis, :, :], axis=2)
+            indices = np.argpartition(chords, k - 1, axis=1)[:, :k]
+            order = np.argsort(np.take_along_axis(chords, indices, axis=1), axis=1)
+            indices = np.take_along_axis(indices, order, axis=1)
+            chords = np.take_along_axis(chords, indices, axis=1)
+        return _chord_to_km(chords), indices
+
+    def within(self, lat, lon, radius_km: float) -> List[np.ndarray]:
+        """Indices of the cities within radius_km of each point, nearest first (one array per point)"""
+        queries = _to_xyz(lat, lon)
+        radius = _km_to_chord(radius_km)
+
+        if self._tree is not None:
+            candidates = self._tree.query_ball_point(queries, radius)
+        else:
+            chords = np.linalg.norm(queries[:, np.newaxis, :] - self._points[np.newaxis, :, :], axis=2)
+            candidates = [np.flatnonzero(row <= radius) for row in chords]
+
+        results = []
+        for query, indices in zip(queries, candidates):
+            indices = np.asarray(indices, dtype=np.intp)
+            distances = np.linalg.norm(self._points[indices] - query, axis=1)
+            results.append(indices[np.argsort(distances, kind='stable')])
+        return results
+
+    def nearest_city(self, lat: float, lon: float, max_distance_km: Optional[float] = None) -> Optional[City]:
+        """The city closest to a point, or None if it is further than max_distance_km"""
+        distances, indices = self.nearest(lat, lon)
+        if max_distance_km is not None and distances[0, 0] > max_distance_km:
+            return None
+        return self.cities[indices[0, 0]]
+
+    def neighbors(self, city: City, k: int = 5) -> List[Tuple[City, float]]:
+        """The k cities closest to a city (excluding itself) with their distances in km"""
+        distances, indices = self.nearest(city.lat, city.lon, k + 1)
+        return [
+            (self.cities[i], distance)
+            for distance, i in zip(distances[0].tolist(), indices[0].tolist())
+            if self.cities[i].id != city.id
+        ][:k]
+
+
+_default_index: Optional[CitySpatialIndex] = None
+
+
+def get_spatial_index() -> CitySpatialIndex:
+    """Spatial index over every city in the registry, built on first use"""
+    global _default_index
+    if _default_index is None:
+        _default_index = CitySpatialIndex(CITIES)
+    return _default_index
@@ -1,167 +1,101 @@
 from typing import Dict, List
+import numpy as np
 import pandas as pd
-from datetime import datetime
-from fuzzywuzzy import fuzz
+
+from city_registry import CITY_NAMES
+from weather_models import forecast_columns
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: Arrow-backed forecast frames
+    pa = None
+
+# Forecast times are shown in Israel local time, whatever the server's timezone
+FORECAST_TIMEZONE = "Asia/Jerusalem"
 
 def celsius_to_fahrenheit(celsius: float) -> float:
     """Convert Celsius to Fahrenheit"""
     return (celsius * 9/5) + 32
 
-def process_forecast_data(forecast_data: Dict) -> pd.DataFrame:
-    """Process forecast data into a pandas DataFrame"""
-    forecasts = []
-    for item in forecast_data['list']:
-        forecasts.append({
-            'datetime': datetime.fromtimestamp(item['dt']),
-            'temperature': item['main']['temp'],
-            'humidity': item['main']['humidity'],
-            'description': item['weather'][0]['description'],
-            'icon': item['weather'][0]['icon']
-        })
-    return pd.DataFrame(forecasts)
-
-def search_cities(query: str, min_score: int = 60) -> List[str]:
-    """Search Israeli cities using fuzzy matching"""
-    matches = []
-    for city in ISRAELI_CITIES:
-        # Calculate fuzzy match score
-        score = fuzz.partial_ratio(query.lower(), city.lower())
-        if score >= min_score:
-            matches.append(city)
-    return sorted(matches)
+def process_forecast_data(forecast_data: Dict, arrow: bool = False) -> pd.DataFrame:
+    """Process forecast data into a compact pandas DataFrame.
 
-ISRAELI_CITIES = [
-    # Major Cities
-    "Jerusalem",
-    "Tel Aviv",
-    "Haifa",
-    "Rishon LeZion",
-    "Petah Tikva",
-    "Ashdod",
-    "Netanya",
-    "Be'er Sheva",
-    "Holon",
-    "Ramat Gan",
+    Columns are built directly from the forecast arrays: float32
+    temperature, int8 humidity and categorical description/icon. With
+    `arrow=True` the columns are Arrow-backed instead (requires pyarrow).
+    """
+    columns = forecast_columns(forecast_data)
+    times = (
+        pd.to_datetime(columns['dt'], unit='s', utc=True)
+        .tz_convert(FORECAST_TIMEZONE)
+        .tz_localize(None)
+    )
+    temperature = columns['temp'].astype(np.float32)
+    humidity = np.rint(columns['humidity']).astype(np.int8)
 
-    # Regional Centers
-    "Herzliya",
-    "Rehovot",
-    "Bat Yam",
-    "Ashkelon",
-    "Kfar Saba",
-    "Ra'anana",
-    "Modiin",
-    "Nahariya",
-    "Lod",
-    "Givatayim",
+    if arrow:
+        if pa is None:
+            raise ImportError("pyarrow is required for Arrow-backed forecast frames")
+        return pd.DataFrame({
+            'datetime': pd.arrays.ArrowExtensionArray(pa.array(times.values, type=pa.timestamp('s'))),
+            'temperature': pd.arrays.ArrowExtensionArray(pa.array(temperature)),
+            'humidity': pd.arrays.ArrowExtensionArray(pa.array(humidity)),
+            'description': pd.arrays.ArrowExtensionArray(pa.array(columns['description']).dictionary_encode()),
+            'icon': pd.arrays.ArrowExtensionArray(pa.array(columns['icon']).dictionary_encode())
+        })
 
-    # Haifa Metropolitan Area (Krayot)
-    "Kiryat Bialik",
-    "Kiryat Motzkin",
-    "Kiryat Yam",
-    "Kiryat Ata",
-    "Kiryat Haim",
-    "Nesher",
-    "Tirat Carmel",
+    return pd.DataFrame({
+        'datetime': times,
+        'temperature': temperature,
+        'humidity': humidity,
+        'description': pd.Categorical(columns['description']),
+        'icon': pd.Categorical(columns['icon'])
+    })
 
-    # Northern Cities
-    "Tiberias",
-    "Safed",
-    "Acre",
-    "Kiryat Shmona",
-    "Afula",
-    "Nazareth",
-    "Migdal HaEmek",
-    "Yokneam",
-    "Kiryat Tivon",
-    "Rosh Pina",
-    "Metula",
-    "Ma'alot-Tarshiha",
-    "Karmiel",
+def daily_forecast_summary(forecast_frame: pd.DataFrame) -> pd.DataFrame:
+    """Summarize a process_forecast_data frame per day.
 
-    # Central Region
-    "Ramat HaSharon",
-    "Hod HaSharon",
-    "Rosh HaAyin",
-    "Yavne",
-    "Ramla",
-    "Ness Ziona",
-    "Or Yehuda",
-    "Ganei Tikva",
-    "Kiryat Ono",
-    "Shoham",
-    "Even Yehuda",
-    "Kadima-Zoran",
-    "Tel Mond",
-    "Kfar Yona",
-    "Givat Shmuel",
-    "Yehud",
+    Returns one row per forecast day, indexed by date, with temp_min,
+    temp_mean, temp_max, humidity (mean) and the day's most frequent
+    description and icon.
+    """
+    frame = forecast_frame.set_index('datetime')
+    daily = frame.resample('D')
+    summary = pd.DataFrame({
+        'temp_min': daily['temperature'].min(),
+        'temp_mean': daily['temperature'].mean(),
+        'temp_max': daily['temperature'].max(),
+        'humidity': daily['humidity'].mean()
+    }).dropna()
 
-    # Southern Cities
-    "Eilat",
-    "Dimona",
-    "Arad",
-    "Sderot",
-    "Ofakim",
-    "Kiryat Gat",
-    "Yeroham",
-    "Mitzpe Ramon",
-    "Netivot",
-    "Rahat",
-    "Yeruham",
-    "Kiryat Malakhi",
-    "Beer Yaakov",
-    "Kuseife",
-    "Tel Sheva",
-    "Lehavim",
-    "Meitar",
-    "Omer",
+    # Dominant condition: the (description, icon) pair seen most often each day
+    counts = (
+        frame.groupby([frame.index.floor('D'), 'description', 'icon'], observed=True)
+        .size()
+        .reset_index(name='count')
+    )
+    dominant = (
+        counts.sort_values('count', ascending=False, kind='stable')
+        .drop_duplicates('datetime')
+        .set_index('datetime')
+    )
+    summary['description'] = dominant['description'].astype(str)
+    summary['icon'] = dominant['icon'].astype(str)
+    summary.index.name = 'date'
+    return summary
 
-    # Sharon Region
-    "Hadera",
-    "Pardes Hanna-Karkur",
-    "Zichron Yaakov",
-    "Or Akiva",
-    "Binyamina",
-    "Givat Ada",
-    "Karkur",
-    "Caesarea",
-    "Bat Hefer",
-    "Ein Iron",
-    "Kfar Yona",
-    "Tel Mond",
+def search_cities(query: str, min_score: int = 60) -> List[str]:
+    """Search Israeli cities by English name, Hebrew name or alternative spelling using fuzzy matching.
 
-    # Judea and Samaria
-    "Maale Adumim",
-    "Ariel",
-    "Beitar Illit",
-    "Modiin Illit",
-    "Efrat",
-    "Kiryat Arba",
-    "Alfei Menashe",
-    "Oranit",
-    "Elkana",
-    "Karnei Shomron",
-    "Kedumim",
-    "Beit El",
-    "Kochav Yaakov",
+    Returns matching English city names sorted alphabetically; use
+    city_search.get_city_index().search for ranked results with scores.
+    """
+    from city_search import get_city_index
+    index = get_city_index()
+    return sorted(result.city for result in index.search(query, limit=len(index), min_score=min_score))
 
-    # Galilee Region
-    "Karmiel",
-    "Ma'alot-Tarshiha",
-    "Sakhnin",
-    "Tamra",
-    "Shfaram",
-    "Majd al-Krum",
-    "Maghar",
-    "Arraba",
-    "I'billin",
-    "Kafr Kanna",
-    "Yafa an-Naseriyye",
-    "Julis",
-    "Abu Sinan",
-    "Jadeidi-Makr"
-]
+# English names of every city in the registry, in display order
+ISRAELI_CITIES = list(CITY_NAMES)
 
 WEATHER_ICONS = {
     "01d": "☀️",
@@ -1,97 +1,1314 @@
-from typing import Dict, Optional
+from typing import Callable, Dict, Hashable, Iterator, List, NamedTuple, Optional, Tuple
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import partial
+import os
+import threading
+import time
+import numpy as np
+import orjson
+import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from city_registry import canonical_city_name, city_key, get_city, get_coordinates
+from spatial_index import get_spatial_index
+from utils import celsius_to_fahrenheit, daily_forecast_summary, process_forecast_data
+from weather_models import Observation
+
+# HTTP transport defaults: (connect, read) timeouts in seconds, pool size and retry policy
+HTTP_CONNECT_TIMEOUT = 3.05
+HTTP_READ_TIMEOUT = 10
+HTTP_POOL_SIZE = 16
+HTTP_MAX_RETRIES = 3
+HTTP_BACKOFF_FACTOR = 0.3
+HTTP_BACKOFF_JITTER = 0.2
+# 429 is not retried here: the rate limiter and circuit breaker handle it without
+# holding a page thread (and every single-flight follower) in a sleep
+HTTP_RETRY_STATUSES = (500, 502, 503, 504)
+
+# Total seconds one request may spend sleeping between retries, Retry-After included
+HTTP_MAX_RETRY_WAIT = 5
+
+# Retries after a connect failure or timeout; read timeouts are never retried, since a
+# hung provider would hold the page (and its single-flight followers) for a full read
+# timeout per attempt; the circuit breaker and failover deal with it instead
+HTTP_CONNECT_RETRIES = 1
+
+# Maximum number of provider requests the batch methods run concurrently
+BATCH_MAX_WORKERS = 8
+
+# Neighboring cities whose current weather is prefetched alongside a selected city
+NEARBY_PREFETCH_COUNT = 4
+
+# Most locations WeatherAPI.com accepts in a single bulk request
+WEATHERAPI_BULK_LIMIT = 50
+
+# Request priorities: high-priority requests (the user's own city) wait for rate-limit
+# tokens; low-priority ones (overlay neighbors, hedges) are shed instead; background
+# ones (the refresher, stale-entry revalidation) queue behind any waiting high-priority
+# request, since nobody is waiting on them
+PRIORITY_HIGH = "high"
+PRIORITY_LOW = "low"
+PRIORITY_BACKGROUND = "background"
+
+# Default request budgets per provider: (requests per second, requests per UTC day)
+PROVIDER_RATE_LIMITS = {
+    "weatherapi": (5.0, 30000),
+    "openweather": (1.0, 30000),
+}
+
+# Share of the daily budget only high-priority requests may use
+LOW_PRIORITY_RESERVE = 0.2
+
+# Longest a high-priority (or background) request waits for a rate-limit token before giving up
+RATE_LIMIT_MAX_WAIT = 5.0
+RATE_LIMIT_BACKGROUND_MAX_WAIT = 120.0
+
+# Provider API roots
+WEATHERAPI_BASE_URL = "https://api.weatherapi.com/v1"
+OPENWEATHER_BASE_URL = "https://api.openweathermap.org/data/2.5"
+
+# Circuit breaker: consecutive failures that open a provider's circuit, and seconds
+# before a half-open probe is let through
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = 30
+
+# Hedged requests fire the secondary provider once the primary is slower than its
+# recent p95 latency (clamped to these bounds); with too few samples the default is used
+HEDGE_DEFAULT_DELAY = 1.0
+HEDGE_MIN_DELAY = 0.2
+HEDGE_MAX_DELAY = 3.0
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+# Temperature units for forecast views
+UNIT_CELSIUS = "C"
+UNIT_FAHRENHEIT = "F"
+
+# Days of forecast requested from WeatherAPI.com (its API allows up to 14);
+# OpenWeatherMap's free forecast is always 5 days
+FORECAST_DAYS = 5
+MAX_FORECAST_DAYS = 14
+
+# WeatherAPI.com condition codes -> OpenWeatherMap icon codes
+# (https://www.weatherapi.com/docs/weather_conditions.json)
+WEATHERAPI_CONDITION_ICONS = {
+    1000: "01d",  # Sunny / Clear
+    1003: "02d",  # Partly cloudy
+    1006: "04d", 1009: "04d",  # Cloudy, Overcast
+    1030: "50d", 1135: "50d", 1147: "50d",  # Mist, Fog, Freezing fog
+    1063: "10d", 1072: "10d", 1150: "10d", 1153: "10d", 1168: "10d", 1171: "10d",  # Patchy rain, drizzle
+    1180: "10d", 1183: "10d", 1186: "10d", 1189: "10d", 1192: "10d", 1195: "10d",  # Rain
+    1198: "10d", 1201: "10d", 1240: "10d", 1243: "10d", 1246: "10d",  # Freezing rain, rain showers
+    1066: "13d", 1069: "13d", 1114: "13d", 1117: "13d", 1204: "13d", 1207: "13d",  # Snow, sleet, blizzard
+    1210: "13d", 1213: "13d", 1216: "13d", 1219: "13d", 1222: "13d", 1225: "13d",
+    1237: "13d", 1249: "13d", 1252: "13d", 1255: "13d", 1258: "13d", 1261: "13d", 1264: "13d",
+    1087: "11d", 1273: "11d", 1276: "11d", 1279: "11d", 1282: "11d",  # Thunder
+}
+_ICON_CODES = np.array(sorted(WEATHERAPI_CONDITION_ICONS))
+_ICONS_BY_CODE = np.array([WEATHERAPI_CONDITION_ICONS[code] for code in _ICON_CODES])
+
+# Seconds a cached response is considered fresh, per endpoint
+CACHE_TTL = {
+    "current": 10 * 60,
+    "forecast": 30 * 60,
+}
+
+# Seconds past expiry during which a stale entry is still served while it is refreshed
+CACHE_STALE_TTL = 60 * 60
+
+# Maximum number of responses held before least-recently-used entries are evicted
+CACHE_MAX_ENTRIES = 512
+
+
+def _to_fahrenheit(frame: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """Copy of a forecast frame with the given Celsius columns converted to Fahrenheit"""
+    return frame.assign(**{column: celsius_to_fahrenheit(frame[column]) for column in columns})
+
+
+def _decode_json(content: bytes):
+    """Decode a provider response body straight from bytes with orjson"""
+    return orjson.loads(content)
+
+
+class _CacheEntry:
+    """A cached response together with its fetch and expiry times.
+
+    `derived` memoizes values computed from the response (see
+    ResponseCache.derive); it is dropped along with the entry.
+    """
+
+    __slots__ = ("value", "fetched_at", "expires_at", "derived")
+
+    def __init__(self, value: Dict, fetched_at: float, expires_at: float):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.expires_at = expires_at
+        self.derived = None
+
+
+class ResponseCache:
+    """Thread-safe, size-bounded LRU cache of normalized API responses.
+
+    An optional persistent store (see persistent_cache.PersistentCache) sits
+    underneath: writes go through to it, and memory misses are filled from
+    it, so a restarted server can serve its last known data while refreshing.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, stale_ttl: float = CACHE_STALE_TTL, persistent=None):
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self.persistent = persistent
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Tuple[Optional[Dict], bool]:
+        """Return (value, is_fresh), or (None, False) if missing or too stale to serve"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now >= entry.expires_at + self.stale_ttl:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry.value, now < entry.expires_at
+
+        if self.persistent is None:
+            return None, False
+        return self._load_persistent(key, now)
+
+    def _load_persistent(self, key: Hashable, now: float) -> Tuple[Optional[Dict], bool]:
+        """Fill a memory miss from the persistent store"""
+        stored = self.persistent.get(key)
+        if stored is None:
+            return None, False
+        value, fetched_at, expires_at = stored
+        if now >= expires_at + self.stale_ttl:
+            # Too old to serve, like an expired memory entry
+            return None, False
+        with self._lock:
+            self._insert(key, _CacheEntry(value, fetched_at, expires_at))
+        return value, now < expires_at
+
+    def set(self, key: Hashable, value: Dict, ttl: float):
+        """Store a response, evicting the least recently used entries if full"""
+        now = time.time()
+        with self._lock:
+            self._insert(key, _CacheEntry(value, now, now + ttl))
+        if self.persistent is not None:
+            self.persistent.set(key, value, now, now + ttl)
+
+    def _insert(self, key: Hashable, entry: _CacheEntry):
+        """Add an entry and evict down to max_entries; caller holds the lock"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def derive(self, key: Hashable, name: str, build: Callable[[Dict], object]) -> Optional[object]:
+        """Return build(value) for a cached response, computing it once per fetched response.
+
+        Returns None if key isn't cached in memory. Derived values are shared
+        like the responses themselves and must be treated as read-only.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.derived is not None and name in entry.derived:
+                return entry.derived[name]
+
+        # Build outside the lock; a concurrent build of the same value is harmless
+        derived = build(entry.value)
+        with self._lock:
+            if entry.derived is None:
+                entry.derived = {}
+            return entry.derived.setdefault(name, derived)
+
+    def fetched_at(self, key: Hashable) -> Optional[float]:
+        """Wall-clock time the cached response for key was fetched, if it is cached"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.fetched_at if entry is not None else None
+
+    def begin_refresh(self, key: Hashable) -> bool:
+        """Claim the background refresh of a stale key; False if one is already running"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key: Hashable):
+        """Release a refresh claimed with begin_refresh"""
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def clear(self):
+        """Drop every cached response"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def _open_persistent_cache():
+    """Open the on-disk cache named by WEATHER_CACHE_DB, if set"""
+    path = os.environ.get('WEATHER_CACHE_DB')
+    if not path:
+        return None
+    from persistent_cache import PersistentCache
+    # Rows are only useful while they can still be served as stale
+    return PersistentCache(path, retention=CACHE_STALE_TTL)
+
+
+# Shared by every WeatherAPI instance, so all sessions and both front-ends reuse entries
+_shared_cache = ResponseCache(persistent=_open_persistent_cache())
+
+
+def _open_history_store():
+    """Open the observation history under WEATHER_HISTORY_DIR, if set"""
+    path = os.environ.get('WEATHER_HISTORY_DIR')
+    if not path:
+        return None
+    from history_store import HistoryStore
+    return HistoryStore(path)
+
+
+# Every current weather response fetched from a provider is recorded here
+_shared_history = _open_history_store()
+
+
+class _InFlightCall:
+    """A call being executed by one thread on behalf of every caller with the same key"""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[Exception] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls so only one of them does the work.
+
+    Callers arriving while a call with the same key is running wait for it
+    and receive its result, or re-raise its exception.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _InFlightCall] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Dict]) -> Dict:
+        """Run fn for key, or wait for the run already in flight"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _InFlightCall()
+                self.executed += 1
+                is_leader = True
+            else:
+                self.coalesced += 1
+                is_leader = False
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+            return call.value
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        """Counters of executed and coalesced calls, plus calls currently in flight"""
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls)
+            }
+
+
+# Shared like the cache, so identical fetches from separate Streamlit sessions are coalesced
+_shared_singleflight = SingleFlight()
+
+
+class ProviderError(Exception):
+    """A provider answered with an error status"""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+    @property
+    def is_outage(self) -> bool:
+        """Whether the error points at the provider being unhealthy rather than the request"""
+        return self.status_code >= 500 or self.status_code == 429
+
+
+class ProviderUnavailable(Exception):
+    """Raised when a provider's circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Per-provider circuit breaker.
+
+    Opens after `failure_threshold` consecutive outage failures; once
+    `reset_timeout` seconds have passed it lets a single probe through
+    (half-open) and closes again if the probe succeeds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Whether a request may be sent now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release_probe(self):
+        """Give back a half-open probe that was never sent"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_error(self, error: BaseException):
+        """Record a failed call; client errors (unknown city, bad key) don't count against the provider"""
+        # Anything else does, so a failed half-open probe always reopens the circuit
+        if isinstance(error, ProviderError) and not error.is_outage:
+            self.record_success()
+        else:
+            self.record_failure()
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Sliding window of a provider's recent response times"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """The q-th percentile (0-100) of recent latencies, or None without enough samples"""
+        with self._lock:
+            if len(self._samples) < HEDGE_MIN_SAMPLES:
+                return None
+            samples = sorted(self._samples)
+        return samples[min(len(samples) - 1, int(len(samples) * q / 100))]
+
+
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_latency_trackers: Dict[str, LatencyTracker] = {}
+_provider_health_lock = threading.Lock()
+
+
+def _get_provider_health(provider: str) -> Tuple[CircuitBreaker, LatencyTracker]:
+    """Return the circuit breaker and latency tracker shared by every session calling a provider"""
+    with _provider_health_lock:
+        if provider not in _circuit_breakers:
+            _circuit_breakers[provider] = CircuitBreaker()
+            _latency_trackers[provider] = LatencyTracker()
+        return _circuit_breakers[provider], _latency_trackers[provider]
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request is shed to stay within the provider's budget"""
+
+
+class RateLimiter:
+    """Token-bucket rate limiter with a daily request budget for one provider.
+
+    Shared by every session in the process. High-priority requests wait for
+    a token (up to max_wait); low-priority requests are shed when no token is
+    free; background requests wait (up to background_max_wait) but let any
+    waiting high-priority request go first. Neither low nor background
+    requests may dip into the share of the daily budget held in reserve.
+    """
+
+    def __init__(
+        self,
+        per_second: float,
+        per_day: int,
+        reserve: float = LOW_PRIORITY_RESERVE,
+        max_wait: float = RATE_LIMIT_MAX_WAIT,
+        background_max_wait: float = RATE_LIMIT_BACKGROUND_MAX_WAIT
+    ):
+        self.per_second = per_second
+        # Bucket size: one second's worth of tokens, but always room for a whole request,
+        # so per-minute style quotas (per_second < 1) still let requests through
+        self.capacity = max(1.0, per_second)
+        self.per_day = per_day
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.background_max_wait = background_max_wait
+        self.shed = 0
+
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._day = self._today()
+        self._day_used = 0
+        # High-priority requests currently waiting for a token
+        self._high_waiting = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _today() -> int:
+        return int(time.time() // 86400)
+
+    def reserve_tokens(self, priority: str = PRIORITY_HIGH, cost: int = 1, day_cost: Optional[int] = None) -> float:
+        """Take tokens if available and return 0, else return seconds to wait.
+
+        `cost` is taken from the per-second bucket and `day_cost` (default:
+        cost) from the daily budget; they differ for bulk requests, which are
+        one HTTP call but bill every location. Raises RateLimitExceeded if
+        the request must be shed.
+        """
+        day_cost = cost if day_cost is None else day_cost
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.per_second)
+            self._updated = now
+            if self._today() != self._day:
+                self._day = self._today()
+                self._day_used = 0
+
+            budget = self.per_day if priority == PRIORITY_HIGH else self.per_day * (1 - self.reserve)
+            if self._day_used + day_cost > budget:
+                self.shed += 1
+                raise RateLimitExceeded(f"Daily request budget exhausted for {priority}-priority requests")
+
+            if priority == PRIORITY_BACKGROUND and self._high_waiting:
+                # Leave the next tokens to the high-priority requests already waiting
+                return max(cost, cost - self._tokens) / self.per_second
+
+            if self._tokens >= cost:
+                self._tokens -= cost
+                self._day_used += day_cost
+                return 0.0
+
+            if priority == PRIORITY_LOW:
+                self.shed += 1
+                raise RateLimitExceeded("Request rate limit reached; low-priority request shed")
+            return (cost - self._tokens) / self.per_second
+
+    def waits(self, priority: str = PRIORITY_HIGH, cost: int = 1, day_cost: Optional[int] = None) -> Iterator[float]:
+        """Yield the seconds to sleep between attempts until tokens are taken; raises RateLimitExceeded.
+
+        Shared by the blocking and asyncio clients, which each sleep their own way.
+        """
+        max_wait = self.background_max_wait if priority == PRIORITY_BACKGROUND else self.max_wait
+        waited = 0.0
+        queued = False
+        try:
+            while True:
+                delay = self.reserve_tokens(priority, cost, day_cost)
+                if delay == 0:
+                    return
+                if waited + delay > max_wait:
+                    with self._lock:
+                        self.shed += 1
+                    raise RateLimitExceeded(f"Timed out after {waited:.1f}s waiting for a rate limit token")
+                if priority == PRIORITY_HIGH and not queued:
+                    queued = True
+                    with self._lock:
+                        self._high_waiting += 1
+                yield delay
+                waited += delay
+        finally:
+            if queued:
+                with self._lock:
+                    self._high_waiting -= 1
+
+    def acquire(self, priority: str = PRIORITY_HIGH, cost: int = 1, day_cost: Optional[int] = None):
+        """Block until the request may be sent, or raise RateLimitExceeded"""
+        for delay in self.waits(priority, cost, day_cost):
+            time.sleep(delay)
+
+    def charge(self, cost: int):
+        """Account for requests sent without acquire (transport retries); later callers wait for them"""
+        with self._lock:
+            self._tokens -= cost
+            self._day_used += cost
+
+    def remaining(self) -> Dict[str, float]:
+        """Remaining budget counters"""
+        with self._lock:
+            return {
+                "tokens": self._tokens,
+                "day_used": self._day_used,
+                "day_remaining": max(0, self.per_day - self._day_used),
+                "shed": self.shed
+            }
+
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def configure_rate_limit(provider: str, per_second: float, per_day: int):
+    """Replace the shared rate limiter for a provider with new budgets"""
+    with _rate_limiters_lock:
+        _rate_limiters[provider] = RateLimiter(per_second, per_day)
+
+
+def _get_rate_limiter(provider: str) -> Optional[RateLimiter]:
+    """Return the rate limiter shared by every session calling a provider"""
+    if provider not in PROVIDER_RATE_LIMITS:
+        return None
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(provider)
+        if limiter is None:
+            limiter = _rate_limiters[provider] = RateLimiter(*PROVIDER_RATE_LIMITS[provider])
+        return limiter
+
+
+class _ProviderRetry(Retry):
+    """Retry policy that honors Retry-After within a total wait budget, so a page never hangs on it"""
+
+    # urllib3 retries 413/429 with a Retry-After header regardless of status_forcelist
+    RETRY_AFTER_STATUS_CODES = frozenset({503})
+
+    def __init__(self, *args, waited: float = 0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Seconds already slept by earlier attempts of the same request
+        self.waited = waited
+
+    def new(self, **kw) -> "_ProviderRetry":
+        retry = super().new(**kw)
+        retry.waited = self.waited
+        return retry
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if self.waited >= HTTP_MAX_RETRY_WAIT:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def sleep(self, response=None):
+        wait = None
+        if self.respect_retry_after_header and response is not None:
+            wait = self.get_retry_after(response)
+        if wait is None:
+            wait = self.get_backoff_time()
+        wait = min(wait, HTTP_MAX_RETRY_WAIT - self.waited)
+        if wait > 0:
+            self.waited += wait
+            time.sleep(wait)
+
+
+_sessions: Dict[Tuple[int, int, float], requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def _get_session(pool_size: int, max_retries: int, backoff_factor: float) -> requests.Session:
+    """Return a keep-alive session shared by every WeatherAPI using the same transport settings"""
+    key = (pool_size, max_retries, backoff_factor)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            retry = _ProviderRetry(
+                total=max_retries,
+                connect=HTTP_CONNECT_RETRIES,
+                read=0,
+                backoff_factor=backoff_factor,
+                backoff_jitter=HTTP_BACKOFF_JITTER,
+                status_forcelist=HTTP_RETRY_STATUSES,
+                allowed_methods=frozenset({"GET"}),
+                respect_retry_after_header=True,
+                raise_on_status=False
+            )
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[key] = session
+        return session
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return the worker pool shared by all batch fetches, bounding total concurrency"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix="weather-fetch")
+        return _executor
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    """Return the pool running hedged provider calls.
+
+    Kept separate from the batch pool, whose workers block on these calls.
+    """
+    global _hedge_executor
+    with _executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=2 * BATCH_MAX_WORKERS, thread_name_prefix="weather-hedge")
+        return _hedge_executor
+
+
+# Providers whose plan rejected a bulk request; they are fetched per city from then on
+_bulk_unsupported = set()
+
+
+class BatchResult(NamedTuple):
+    """Outcome for one city of a batch fetch: its data, or the error raised fetching it"""
+    city: str
+    data: Optional[Dict]
+    error: Optional[Exception]
+
 
 class WeatherAPI:
     """Class to interact with the weather API"""
 
-    def __init__(self):
-        import os
+    def __init__(
+        self,
+        cache: Optional[ResponseCache] = None,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        read_timeout: float = HTTP_READ_TIMEOUT,
+        pool_size: int = HTTP_POOL_SIZE,
+        max_retries: int = HTTP_MAX_RETRIES,
+        backoff_factor: float = HTTP_BACKOFF_FACTOR,
+        use_bulk: bool = True,
+        failover: bool = True,
+        hedge: bool = False,
+        forecast_days: int = FORECAST_DAYS
+    ):
+        # Responses are shared process-wide unless a dedicated cache is given
+        self.cache = cache if cache is not None else _shared_cache
+        self.singleflight = _shared_singleflight if cache is None else SingleFlight()
+
+        # Pooled keep-alive transport, reused across reruns so each city skips the TCP/TLS handshake
+        self.session = _get_session(pool_size, max_retries, backoff_factor)
+        self.timeout = (connect_timeout, read_timeout)
+
+        # Fetched observations are recorded to the history store, when one is configured
+        self.history = _shared_history
+
+        # Pack batch lookups into provider bulk requests where the provider supports it
+        self.use_bulk = use_bulk
+        self.forecast_days = max(1, min(forecast_days, MAX_FORECAST_DAYS))
         
         # Try WeatherAPI.com first (more reliable), then OpenWeatherMap
         self.weatherapi_key = os.environ.get('WEATHERAPI_KEY')
         self.openweather_key = os.environ.get('OPENWEATHER_API_KEY')
+        self.base_urls = {
+            "weatherapi": WEATHERAPI_BASE_URL,
+            "openweather": OPENWEATHER_BASE_URL
+        }
         
         if self.weatherapi_key:
             self.use_weatherapi = True
-            self.base_url = "https://api.weatherapi.com/v1"
+            self.base_url = WEATHERAPI_BASE_URL
             self.api_key = self.weatherapi_key
             self.use_mock_data = False
+            self.provider = "weatherapi"
         elif self.openweather_key:
             self.use_weatherapi = False
-            self.base_url = "https://api.openweathermap.org/data/2.5"
+            self.base_url = OPENWEATHER_BASE_URL
             self.api_key = self.openweather_key
             self.use_mock_data = False
+            self.provider = "openweather"
         else:
             # No API keys available, use mock data
             self.use_mock_data = True
             self.use_weatherapi = False
-            self.base_url = "https://api.openweathermap.org/data/2.5"
+            self.base_url = OPENWEATHER_BASE_URL
             self.api_key = None
+            self.provider = "mock"
 
-        # Hebrew city translations
-        self.hebrew_to_english = {
-            "ירושלים": "Jerusalem",
-            "תל אביב": "Tel Aviv",
-            "חיפה": "Haifa",
-            "ראשון לציון": "Rishon LeZion",
-            "פתח תקווה": "Petah Tikva",
-            "אשדוד": "Ashdod",
-            "נתניה": "Netanya",
-            "באר שבע": "Beer Sheva",
-            "חולון": "Holon",
-            "רמת גן": "Ramat Gan",
-            "הרצליה": "Herzliya",
-            "רחובות": "Rehovot",
-            "בת ים": "Bat Yam",
-            "אשקלון": "Ashkelon",
-            "כפר סבא": "Kfar Saba",
-            "רעננה": "Ra'anana",
-            "מודיעין": "Modiin",
-            "נהריה": "Nahariya",
-            "לוד": "Lod",
-            "גבעתיים": "Givatayim",
-            "אילת": "Eilat",
-            "נצרת": "Nazareth",
-            "טבריה": "Tiberias",
-            "צפת": "Safed",
-            "עכו": "Acre",
-            "חדרה": "Hadera"
+        # Providers tried in order: the primary above, then (in failover mode) any other
+        # provider with a key. Cache entries stay keyed by the primary either way.
+        self.providers = [] if self.use_mock_data else [self.provider]
+        if failover and self.use_weatherapi and self.openweather_key:
+            self.providers.append("openweather")
+        self.hedge = hedge
+        self._provider_fetchers = {
+            "weatherapi": {
+                "current": self._get_weatherapi_current,
+                "forecast": self._get_weatherapi_forecast,
+                "bundle": self._get_weatherapi_bundle
+            },
+            "openweather": {
+                "current": self._get_openweather_current,
+                "forecast": self._get_openweather_forecast
+            }
         }
 
-    def get_current_weather(self, city: str) -> Dict:
-        """Get current weather for a city"""
-        # Translate Hebrew city names to English if necessary
-        if city in self.hebrew_to_english:
-            query_city = self.hebrew_to_english[city]
-        else:
-            query_city = city
-        
+        # Request budget shared across sessions (mock data needs none)
+        self.rate_limiter = _get_rate_limiter(self.provider)
+
+    def _acquire(
+        self,
+        priority: str,
+        cost: int = 1,
+        provider: Optional[str] = None,
+        day_cost: Optional[int] = None
+    ):
+        """Take request budget from a provider's rate limiter (default: the primary) before calling it"""
+        limiter = self.rate_limiter if provider is None else _get_rate_limiter(provider)
+        if limiter is not None:
+            limiter.acquire(priority, cost, day_cost)
+
+    def remaining_budget(self) -> Optional[Dict[str, float]]:
+        """Remaining rate-limit and daily budget counters for the current provider"""
+        if self.rate_limiter is None:
+            return None
+        return self.rate_limiter.remaining()
+
+    def _request(self, url: str, params: Dict) -> requests.Response:
+        """GET a provider URL over the pooled session with timeouts and retries"""
+        response = self.session.get(url, params=params, timeout=self.timeout)
+
+        # Retried attempts the provider answered count against its budget like any other request
+        retries = getattr(response.raw, 'retries', None)
+        resent = sum(1 for attempt in retries.history if attempt.status is not None) if retries is not None else 0
+        if resent:
+            provider = next((name for name, base in self.base_urls.items() if url.startswith(base)), None)
+            limiter = _get_rate_limiter(provider) if provider is not None else None
+            if limiter is not None:
+                limiter.charge(resent)
+        return response
+
+    def provider_status(self) -> Dict[str, Dict]:
+        """Circuit state and recent p95 latency for each configured provider"""
+        status = {}
+        for provider in self.providers:
+            breaker, latency = _get_provider_health(provider)
+            status[provider] = {"circuit": breaker.state, "p95_latency": latency.percentile(95)}
+        return status
+
+    def _fetch_provider(self, endpoint: str, city: str, priority: str) -> Dict:
+        """Fetch an endpoint from the first healthy provider, failing over (or hedging) to the next"""
         if self.use_mock_data:
-            return self._get_mock_current_weather(query_city)
-        
-        if self.use_weatherapi:
-            return self._get_weatherapi_current(query_city)
-        else:
-            return self._get_openweather_current(query_city)
+            if endpoint == "current":
+                return self._get_mock_current_weather(city)
+            return self._get_mock_forecast(city)
+
+        candidates = [provider for provider in self.providers if endpoint in self._provider_fetchers[provider]]
+        if self.hedge and len(candidates) > 1:
+            return self._hedged_fetch(endpoint, city, priority, candidates[0], candidates[1])
+
+        last_error: Optional[Exception] = None
+        for provider in candidates:
+            try:
+                return self._call_provider(provider, endpoint, city, priority)
+            except Exception as e:
+                last_error = e
+        raise last_error
+
+    def _call_provider(self, provider: str, endpoint: str, city: str, priority: str) -> Dict:
+        """Call one provider, enforcing its circuit breaker and rate limit and recording its health"""
+        return self._guarded_call(provider, priority, lambda: self._provider_fetchers[provider][endpoint](city))
+
+    def _guarded_call(self, provider: str, priority: str, call: Callable[[], object], day_cost: Optional[int] = None):
+        """Run a request to a provider behind its circuit breaker and rate limit, recording its health"""
+        breaker, latency = _get_provider_health(provider)
+        if not breaker.allow_request():
+            raise ProviderUnavailable(f"{provider} is temporarily unavailable")
+
+        try:
+            self._acquire(priority, provider=provider, day_cost=day_cost)
+        except RateLimitExceeded:
+            # Not the provider's fault; hand back a half-open probe without judging it
+            breaker.release_probe()
+            raise
+
+        start = time.monotonic()
+        try:
+            value = call()
+        except Exception as e:
+            # Includes undecodable bodies and responses a normalizer can't read
+            breaker.record_error(e)
+            raise
+        breaker.record_success()
+        latency.record(time.monotonic() - start)
+        return value
+
+    def _hedge_delay(self, provider: str) -> float:
+        """How long to wait on a provider before hedging: its recent p95 latency"""
+        p95 = _get_provider_health(provider)[1].percentile(95)
+        if p95 is None:
+            return HEDGE_DEFAULT_DELAY
+        return min(max(p95, HEDGE_MIN_DELAY), HEDGE_MAX_DELAY)
+
+    def _hedged_fetch(self, endpoint: str, city: str, priority: str, primary: str, secondary: str) -> Dict:
+        """Call the primary; if it is slower than its p95, also call the secondary and take the first success"""
+        executor = _get_hedge_executor()
+        primary_future = executor.submit(self._call_provider, primary, endpoint, city, priority)
+        try:
+            return primary_future.result(timeout=self._hedge_delay(primary))
+        except FutureTimeoutError:
+            pass
+        except Exception:
+            # The primary failed outright; fail over to the secondary at full priority
+            return self._call_provider(secondary, endpoint, city, priority)
+
+        # Hedges are extra requests, so they are first in line to be shed
+        pending = {primary_future, executor.submit(self._call_provider, secondary, endpoint, city, PRIORITY_LOW)}
+        last_error: Optional[Exception] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                last_error = future.exception()
+        raise last_error
+
+    def _provider_request(self, provider: str, endpoint: str, city: str) -> Tuple[str, Dict, Callable[[Dict], Dict]]:
+        """URL, query parameters and normalizer for a provider endpoint, shared with AsyncWeatherAPI"""
+        if provider == "weatherapi":
+            if endpoint == "current":
+                url, params = self._weatherapi_current_request(city)
+                return url, params, lambda data: self._normalize_weatherapi_current(data, city)
+            url, params = self._weatherapi_forecast_request(city)
+            return url, params, self._normalize_weatherapi_forecast
+
+        if endpoint == "current":
+            url, params = self._openweather_current_request(city)
+            return url, params, self._normalize_openweather_current
+        url, params = self._openweather_forecast_request(city)
+        return url, params, lambda data: data
+
+    def _resolve_city(self, city: str) -> str:
+        """Translate Hebrew city names to English and canonicalize the spelling"""
+        return canonical_city_name(city)
+
+    def _weatherapi_query(self, city: str) -> str:
+        """WeatherAPI.com `q` value: coordinates when known, so the provider skips geocoding"""
+        coordinates = get_coordinates(city)
+        if coordinates is not None:
+            return f"{coordinates[0]},{coordinates[1]}"
+        return f"{city},Israel"
+
+    def _openweather_location(self, city: str) -> Dict:
+        """OpenWeatherMap location parameters: coordinates when known, otherwise the city name"""
+        coordinates = get_coordinates(city)
+        if coordinates is not None:
+            return {"lat": coordinates[0], "lon": coordinates[1]}
+        return {"q": f"{city},IL"}
+
+    def _cache_key(self, endpoint: str, city: str) -> Tuple[str, str, str]:
+        """Cache key shared by every session asking the same provider about the same city"""
+        if endpoint in ("forecast", "bundle") and self.forecast_days != FORECAST_DAYS:
+            # Longer horizons are separate responses from the default one
+            endpoint = f"{endpoint}/{self.forecast_days}d"
+        return (self.provider, endpoint, city_key(city))
+
+    def _cached_fetch(self, endpoint: str, city: str, priority: str = PRIORITY_HIGH, force: bool = False) -> Dict:
+        """Serve a response from the shared cache, fetching it on a miss.
+
+        Stale entries are returned immediately while a background thread
+        refreshes them; `force` skips the cache and always fetches. Cached
+        responses are shared between sessions and must be treated as read-only.
+        """
+        key = self._cache_key(endpoint, city)
+
+        value, fresh = self.cache.get(key) if not force else (None, False)
+        if value is not None:
+            if not fresh:
+                self._refresh_in_background(
+                    key, lambda: self._fetch_and_store(key, endpoint, city, PRIORITY_BACKGROUND)
+                )
+            return value
+
+        # Concurrent misses for the same key share a single provider request
+        return self.singleflight.do(key, lambda: self._fetch_and_store(key, endpoint, city, priority))
+
+    def _fetch_and_store(self, key: Tuple[str, str, str], endpoint: str, city: str, priority: str) -> Dict:
+        """Fetch a response from the providers and cache it"""
+        value = self._fetch_provider(endpoint, city, priority)
+        self.cache.set(key, value, CACHE_TTL[endpoint])
+        if endpoint == "current":
+            self._record(city, value)
+        return value
+
+    def _record(self, city: str, current: Dict):
+        """Queue a freshly fetched current weather response for the history store"""
+        if self.history is not None:
+            self.history.append(city, current)
+
+    def get_history(self, city: str, start=None, end=None, fields: Optional[List[str]] = None) -> pd.DataFrame:
+        """Recorded observations of a city between start and end, oldest first.
+
+        See HistoryStore.history; returns an empty frame when no history
+        store is configured (WEATHER_HISTORY_DIR unset).
+        """
+        if self.history is None:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name='time'), columns=fields or [])
+        return self.history.history(self._resolve_city(city), start, end, fields)
+
+    def _refresh_in_background(self, key: Tuple[str, str, str], load: Callable[[], Dict]):
+        """Refresh a stale cache entry on a daemon thread, unless a refresh is already running"""
+        if self.cache.begin_refresh(key):
+            threading.Thread(target=self._revalidate, args=(key, load), daemon=True).start()
+
+    def _revalidate(self, key: Tuple[str, str, str], load: Callable[[], Dict]):
+        """Refresh a stale cache entry in the background"""
+        try:
+            self.singleflight.do(key, load)
+        except Exception:
+            # Keep serving the stale entry; the next request will try again
+            pass
+        finally:
+            self.cache.end_refresh(key)
+
+    def get_weather_bundle(self, city: str, priority: str = PRIORITY_HIGH, force: bool = False) -> Dict:
+        """Get current weather and forecast for a city, with one provider call where possible.
+
+        Returns {"current": ..., "forecast": ...} in the same formats as
+        get_current_weather and get_forecast. WeatherAPI.com's forecast
+        response already carries current conditions, so both come from a
+        single request; other providers fall back to two lookups. With
+        `force` both parts are fetched from the provider even if cached.
+        """
+        query_city = self._resolve_city(city)
+        if self.use_mock_data or not self.use_weatherapi:
+            return {
+                "current": self.get_current_weather(query_city, priority, force),
+                "forecast": self.get_forecast(query_city, priority, force)
+            }
+
+        key = self._cache_key("bundle", query_city)
+
+        current = forecast = None
+        if not force:
+            current, current_fresh = self.cache.get(self._cache_key("current", query_city))
+            forecast, forecast_fresh = self.cache.get(self._cache_key("forecast", query_city))
+        if current is not None and forecast is not None:
+            if not (current_fresh and forecast_fresh):
+                self._refresh_in_background(key, lambda: self._fetch_bundle(query_city, PRIORITY_BACKGROUND))
+            return {"current": current, "forecast": forecast}
+
+        return self.singleflight.do(key, lambda: self._fetch_bundle(query_city, priority))
+
+    def get_weather_bundle_many(
+        self,
+        cities: List[str],
+        priority: str = PRIORITY_HIGH,
+        force: bool = False
+    ) -> List[BatchResult]:
+        """Get current weather and forecast bundles for several cities concurrently, in input order"""
+        return self._fetch_many(partial(self.get_weather_bundle, force=force), cities, priority)
+
+    def _fetch_bundle(self, city: str, priority: str) -> Dict:
+        """Fetch a bundle and cache both its current and forecast parts"""
+        try:
+            bundle = self._call_provider(self.provider, "bundle", city, priority)
+        except Exception:
+            if len(self.providers) < 2:
+                raise
+            # Fall back to separate lookups on the secondary provider
+            fallback = self.providers[1]
+            bundle = {
+                endpoint: self._call_provider(fallback, endpoint, city, priority)
+                for endpoint in ("current", "forecast")
+            }
+
+        self.cache.set(self._cache_key("current", city), bundle["current"], CACHE_TTL["current"])
+        self.cache.set(self._cache_key("forecast", city), bundle["forecast"], CACHE_TTL["forecast"])
+        self._record(city, bundle["current"])
+        return bundle
+
+    def _get_weatherapi_bundle(self, city: str) -> Dict:
+        """Get current weather and forecast from a single WeatherAPI.com forecast request"""
+        url, params = self._weatherapi_forecast_request(city)
+        response = self._request(url, params)
+        if response.status_code != 200:
+            raise ProviderError(f"Failed to fetch weather data for {city}: {response.text}", response.status_code)
+
+        data = _decode_json(response.content)
+        return {
+            "current": self._normalize_weatherapi_current(data, city),
+            "forecast": self._normalize_weatherapi_forecast(data)
+        }
+
+    def get_current_weather(self, city: str, priority: str = PRIORITY_HIGH, force: bool = False) -> Dict:
+        """Get current weather for a city"""
+        query_city = self._resolve_city(city)
+        return self._cached_fetch("current", query_city, priority, force)
     
+    def get_current_weather_many(
+        self,
+        cities: List[str],
+        priority: str = PRIORITY_HIGH,
+        force: bool = False
+    ) -> List[BatchResult]:
+        """Get current weather for several cities, in input order.
+
+        Uncached and stale cities (with `force`, every city) are packed into
+        provider bulk requests when available, otherwise fetched concurrently
+        one city per request.
+        """
+        if self._supports_bulk():
+            return self._get_current_weather_bulk(cities, priority, force)
+        return self._fetch_many(partial(self.get_current_weather, force=force), cities, priority)
+
+    def prefetch_nearby(self, city: str, count: int = NEARBY_PREFETCH_COUNT):
+        """Warm the cache with current weather for the cities nearest to one, on a background thread"""
+        registry_city = get_city(self._resolve_city(city))
+        if registry_city is None:
+            return
+        neighbors = [
+            neighbor.english for neighbor, _ in get_spatial_index().neighbors(registry_city, count)
+            if not self.cache.get(self._cache_key("current", neighbor.english))[1]
+        ]
+        if neighbors:
+            # Low priority, so these are shed before anyone's own requests
+            threading.Thread(
+                target=self.get_current_weather_many, args=(neighbors, PRIORITY_LOW), daemon=True
+            ).start()
+
+    def get_observation(self, city: str, priority: str = PRIORITY_HIGH) -> Observation:
+        """Get current weather for a city as an Observation record"""
+        return self._observation(city, self.get_current_weather(city, priority))
+
+    def get_observations_many(self, cities: List[str], priority: str = PRIORITY_HIGH) -> List[BatchResult]:
+        """Get current weather for several cities as Observation records, in input order"""
+        return [
+            result if result.error is not None else result._replace(data=self._observation(result.city, result.data))
+            for result in self.get_current_weather_many(cities, priority)
+        ]
+
+    def _observation(self, city: str, current: Dict) -> Observation:
+        """Observation for a current weather response, built once per cached response"""
+        query_city = self._resolve_city(city)
+        key = self._cache_key("current", query_city)
+        build = lambda data: Observation.from_response(query_city, data, get_coordinates(query_city))
+        observation = self.cache.derive(key, "observation", build)
+        if observation is None:
+            # The response was evicted (or came from a different cache); build it uncached
+            observation = build(current)
+        return observation
+
+    def _supports_bulk(self) -> bool:
+        """Whether batch lookups should use the provider's bulk endpoint"""
+        # OpenWeatherMap's group endpoint only accepts numeric city IDs, which we don't keep.
+        # While WeatherAPI.com is failing, the per-city path handles failover instead.
+        return (
+            self.use_bulk
+            and self.use_weatherapi
+            and self.provider not in _bulk_unsupported
+            and _get_provider_health(self.provider)[0].state == CircuitBreaker.CLOSED
+        )
+
+    def _get_current_weather_bulk(self, cities: List[str], priority: str, force: bool = False) -> List[BatchResult]:
+        """Serve cached cities directly and fetch the rest in as few bulk requests as possible.
+
+        Missing cities are fetched before returning; stale ones are served as
+        they are and refreshed together by one background bulk fetch.
+        """
+        resolved = [self._resolve_city(city) for city in cities]
+
+        cached: Dict[Tuple[str, str, str], Dict] = {}
+        misses: Dict[Tuple[str, str, str], str] = {}
+        stale: Dict[Tuple[str, str, str], str] = {}
+        for query_city in resolved:
+            key = self._cache_key("current", query_city)
+            if key in cached or key in misses:
+                continue
+            value, fresh = self.cache.get(key) if not force else (None, False)
+            if value is None:
+                misses[key] = query_city
+                continue
+            cached[key] = value
+            if not fresh:
+                stale[key] = query_city
+
+        # Stale keys another request is already refreshing are left to it
+        refresh = [query_city for key, query_city in stale.items() if self.cache.begin_refresh(key)]
+        if refresh:
+            threading.Thread(target=self._revalidate_bulk, args=(refresh,), daemon=True).start()
+
+        errors: Dict[Tuple[str, str, str], Exception] = {}
+        if misses:
+            try:
+                errors = self._fetch_weatherapi_bulk_many(list(misses.values()), priority)
+            except Exception:
+                # Bulk failed as a whole; fall back to one request per city below
+                pass
+            else:
+                for key in misses:
+                    value = self.cache.get(key)[0] if key not in errors else None
+                    if value is not None:
+                        cached[key] = value
+
+        # Cities the bulk response reported as failed keep their error; if bulk failed
+        # outright, the rest are fetched one city per request
+        results: List[Optional[BatchResult]] = []
+        for city, query_city in zip(cities, resolved):
+            key = self._cache_key("current", query_city)
+            if key in cached:
+                results.append(BatchResult(city, cached[key], None))
+            elif key in errors:
+                results.append(BatchResult(city, None, errors[key]))
+            else:
+                results.append(None)
+        remaining = [i for i, result in enumerate(results) if result is None]
+        fetched = self._fetch_many(partial(self.get_current_weather, force=force), [resolved[i] for i in remaining], priority)
+        for i, result in zip(remaining, fetched):
+            results[i] = result._replace(city=cities[i])
+        return results
+
+    def _revalidate_bulk(self, cities: List[str]):
+        """Refresh stale current weather entries claimed with begin_refresh, in bulk requests"""
+        try:
+            self._fetch_weatherapi_bulk_many(cities, PRIORITY_BACKGROUND)
+        except Exception:
+            # Keep serving the stale entries; the next request will try again
+            pass
+        finally:
+            for city in cities:
+                self.cache.end_refresh(self._cache_key("current", city))
+
+    def _fetch_weatherapi_bulk_many(self, cities: List[str], priority: str) -> Dict[Tuple[str, str, str], Exception]:
+        """Fetch current weather for any number of cities, WEATHERAPI_BULK_LIMIT per concurrent request"""
+        chunks = [cities[i:i + WEATHERAPI_BULK_LIMIT] for i in range(0, len(cities), WEATHERAPI_BULK_LIMIT)]
+        errors: Dict[Tuple[str, str, str], Exception] = {}
+        for chunk_errors in _get_executor().map(lambda chunk: self._fetch_weatherapi_bulk(chunk, priority), chunks):
+            errors.update(chunk_errors)
+        return errors
+
+    def _fetch_weatherapi_bulk(self, cities: List[str], priority: str) -> Dict[Tuple[str, str, str], Exception]:
+        """Fetch current weather for up to WEATHERAPI_BULK_LIMIT cities in one request.
+
+        Normalized responses are stored in the cache; per-location failures
+        are returned keyed by cache key.
+        """
+        # One HTTP request, but the provider bills every location in it
+        data = self._guarded_call(
+            self.provider, priority, lambda: self._post_weatherapi_bulk(cities), day_cost=len(cities)
+        )
+
+        errors = {}
+        for item in data.get('bulk', []):
+            query = item['query']
+            city = cities[int(query['custom_id'])]
+            key = self._cache_key("current", city)
+            if 'error' in query:
+                errors[key] = Exception(f"Failed to fetch weather data for {city}: {query['error'].get('message')}")
+                continue
+            current = self._normalize_weatherapi_current(query, city)
+            self.cache.set(key, current, CACHE_TTL["current"])
+            self._record(city, current)
+        return errors
+
+    def _post_weatherapi_bulk(self, cities: List[str]) -> Dict:
+        """POST a WeatherAPI.com bulk current weather request and decode the response"""
+        url = f"{self.base_urls['weatherapi']}/current.json"
+        params = {"key": self.weatherapi_key, "q": "bulk"}
+        body = {
+            "locations": [
+                {"q": self._weatherapi_query(city), "custom_id": str(i)}
+                for i, city in enumerate(cities)
+            ]
+        }
+        response = self.session.post(url, params=params, json=body, timeout=self.timeout)
+        if response.status_code in (400, 401, 403):
+            # Bulk requests need a paid plan; stop trying them for this provider
+            _bulk_unsupported.add(self.provider)
+        if response.status_code != 200:
+            raise ProviderError(f"Failed to fetch bulk weather data: {response.text}", response.status_code)
+        return _decode_json(response.content)
+
+    def _fetch_many(self, fetch: Callable[[str, str], Dict], cities: List[str], priority: str) -> List[BatchResult]:
+        """Run a per-city fetch across the shared worker pool, collecting results or errors"""
+        executor = _get_executor()
+        futures = [executor.submit(fetch, city, priority) for city in cities]
+
+        results = []
+        for city, future in zip(cities, futures):
+            try:
+                results.append(BatchResult(city, future.result(), None))
+            except Exception as e:
+                results.append(BatchResult(city, None, e))
+        return results
+
     def _get_weatherapi_current(self, city: str) -> Dict:
         """Get current weather from WeatherAPI.com"""
-        url = f"{self.base_url}/current.json"
+        url, params = self._weatherapi_current_request(city)
+        response = self._request(url, params)
+        if response.status_code != 200:
+            raise ProviderError(f"Failed to fetch weather data for {city}: {response.text}", response.status_code)
+
+        return self._normalize_weatherapi_current(_decode_json(response.content), city)
+
+    def _weatherapi_current_request(self, city: str) -> Tuple[str, Dict]:
+        """URL and query parameters for a WeatherAPI.com current weather lookup"""
+        url = f"{self.base_urls['weatherapi']}/current.json"
         params = {
-            "key": self.api_key,
-            "q": f"{city},Israel",
+            "key": self.weatherapi_key,
+            "q": self._weatherapi_query(city),
             "aqi": "no"
         }
-        response = requests.get(url, params=params)
-        if response.status_code != 200:
-            raise Exception(f"Failed to fetch weather data for {city}: {response.text}")
+        return url, params
 
-        data = response.json()
-        
+    def _normalize_weatherapi_current(self, data: Dict, city: str) -> Dict:
+        """Convert a WeatherAPI.com current weather response to OpenWeatherMap format"""
         # Convert WeatherAPI format to OpenWeatherMap format for consistency
-        # Map WeatherAPI condition to appropriate icon
+        # Map the WeatherAPI condition code to an icon with the same table as forecasts,
+        # falling back to the condition text for codes it doesn't list
         condition_text = data['current']['condition'].get('text', 'Clear').lower()
-        icon = self._map_condition_to_icon(condition_text)
+        icon = WEATHERAPI_CONDITION_ICONS.get(data['current']['condition'].get('code'))
+        if icon is None:
+            icon = self._map_condition_to_icon(condition_text)
         
         converted = {
             "coord": {"lon": data['location']['lon'], "lat": data['location']['lat']},
@@ -116,6 +1333,7 @@ class WeatherAPI:
                 "direction": self.get_wind_direction(data['current']['wind_degree'])
             },
             "clouds": {"all": data['current']['cloud']},
+            "dt": data['current'].get('last_updated_epoch', int(time.time())),
             "name": city
         }
         
@@ -127,18 +1345,25 @@ class WeatherAPI:
     
     def _get_openweather_current(self, city: str) -> Dict:
         """Get current weather from OpenWeatherMap"""
-        url = f"{self.base_url}/weather"
+        url, params = self._openweather_current_request(city)
+        response = self._request(url, params)
+        if response.status_code != 200:
+            raise ProviderError(f"Failed to fetch weather data for {city}: {response.text}", response.status_code)
+
+        return self._normalize_openweather_current(_decode_json(response.content))
+
+    def _openweather_current_request(self, city: str) -> Tuple[str, Dict]:
+        """URL and query parameters for an OpenWeatherMap current weather lookup"""
+        url = f"{self.base_urls['openweather']}/weather"
         params = {
-            "q": f"{city},IL",
-            "appid": self.api_key,
+            **self._openweather_location(city),
+            "appid": self.openweather_key,
             "units": "metric"
         }
-        response = requests.get(url, params=params)
-        if response.status_code != 200:
-            raise Exception(f"Failed to fetch weather data for {city}: {response.text}")
+        return url, params
 
-        data = response.json()
-        
+    def _normalize_openweather_current(self, data: Dict) -> Dict:
+        """Add derived fields to an OpenWeatherMap current weather response"""
         # Add wind direction based on degrees
         if 'wind' in data and 'deg' in data['wind']:
             data['wind']['direction'] = self.get_wind_direction(data['wind']['deg'])
@@ -150,6 +1375,8 @@ class WeatherAPI:
         import random
         from datetime import datetime
         
+        lat, lon = get_coordinates(city) or (31.77, 35.21)
+
         # Create realistic mock data
         temp = round(random.uniform(15, 35), 1)
         humidity = random.randint(30, 80)
@@ -190,7 +1417,7 @@ class WeatherAPI:
         
         # Create base weather data
         weather_data = {
-            "coord": {"lon": 35.21, "lat": 31.77},
+            "coord": {"lon": lon, "lat": lat},
             "weather": [{"id": 800, "main": "Clear", "description": condition, "icon": icon}],
             "base": "stations",
             "main": {
@@ -233,82 +1460,149 @@ class WeatherAPI:
         
         return weather_data
 
-    def get_forecast(self, city: str) -> Dict:
+    def get_forecast(self, city: str, priority: str = PRIORITY_HIGH, force: bool = False) -> Dict:
         """Get forecast for a city"""
-        # Translate Hebrew city names to English if necessary
-        if city in self.hebrew_to_english:
-            query_city = self.hebrew_to_english[city]
-        else:
-            query_city = city
-            
-        if self.use_mock_data:
-            return self._get_mock_forecast(query_city)
-        
-        if self.use_weatherapi:
-            return self._get_weatherapi_forecast(query_city)
-        else:
-            return self._get_openweather_forecast(query_city)
+        query_city = self._resolve_city(city)
+        return self._cached_fetch("forecast", query_city, priority, force)
     
+    def get_forecast_frame(
+        self,
+        city: str,
+        priority: str = PRIORITY_HIGH,
+        arrow: bool = False,
+        unit: str = UNIT_CELSIUS
+    ) -> pd.DataFrame:
+        """Get forecast for a city as a DataFrame (see utils.process_forecast_data).
+
+        Each unit's frame is built once per fetched forecast and shared
+        between sessions, so it must not be modified in place.
+        """
+        name = "frame/arrow" if arrow else "frame"
+        build = lambda data: process_forecast_data(data, arrow=arrow)
+        if unit == UNIT_FAHRENHEIT:
+            # Converted from the entry being memoized on, so both units always describe the same fetch
+            return self._derive_forecast(
+                city, priority, f"{name}/{unit}", lambda data: _to_fahrenheit(build(data), ['temperature'])
+            )
+        return self._derive_forecast(city, priority, name, build)
+
+    def get_daily_summary(self, city: str, priority: str = PRIORITY_HIGH, unit: str = UNIT_CELSIUS) -> pd.DataFrame:
+        """Get per-day min/mean/max forecast for a city (see utils.daily_forecast_summary).
+
+        Computed once per fetched forecast and unit, and shared; must not be modified in place.
+        """
+        # Summarize the entry being memoized on, not a frame fetched earlier: a background
+        # refresh may have replaced the forecast in between
+        build = lambda data: daily_forecast_summary(process_forecast_data(data))
+        if unit == UNIT_FAHRENHEIT:
+            temperatures = ['temp_min', 'temp_mean', 'temp_max']
+            return self._derive_forecast(
+                city, priority, f"daily/{unit}", lambda data: _to_fahrenheit(build(data), temperatures)
+            )
+        return self._derive_forecast(city, priority, "daily", build)
+
+    def _derive_forecast(self, city: str, priority: str, name: str, build: Callable[[Dict], object]):
+        """Value computed from a city's forecast, memoized on its cache entry"""
+        forecast = self.get_forecast(city, priority)
+        key = self._cache_key("forecast", self._resolve_city(city))
+        value = self.cache.derive(key, name, build)
+        if value is None:
+            # The forecast was evicted (or came from a different cache); build it uncached
+            value = build(forecast)
+        return value
+
+    def get_forecast_many(self, cities: List[str], priority: str = PRIORITY_HIGH) -> List[BatchResult]:
+        """Get forecasts for several cities concurrently, in input order"""
+        return self._fetch_many(self.get_forecast, cities, priority)
+
     def _get_weatherapi_forecast(self, city: str) -> Dict:
         """Get forecast from WeatherAPI.com"""
-        url = f"{self.base_url}/forecast.json"
+        url, params = self._weatherapi_forecast_request(city)
+        response = self._request(url, params)
+        if response.status_code != 200:
+            raise ProviderError(f"Failed to fetch forecast data for {city}: {response.text}", response.status_code)
+
+        return self._normalize_weatherapi_forecast(_decode_json(response.content))
+
+    def _weatherapi_forecast_request(self, city: str) -> Tuple[str, Dict]:
+        """URL and query parameters for a WeatherAPI.com forecast lookup"""
+        url = f"{self.base_urls['weatherapi']}/forecast.json"
         params = {
-            "key": self.api_key,
-            "q": f"{city},Israel",
-            "days": 5,
+            "key": self.weatherapi_key,
+            "q": self._weatherapi_query(city),
+            "days": self.forecast_days,
             "aqi": "no",
             "alerts": "no"
         }
-        response = requests.get(url, params=params)
-        if response.status_code != 200:
-            raise Exception(f"Failed to fetch forecast data for {city}: {response.text}")
+        return url, params
 
-        data = response.json()
-        
-        # Convert to OpenWeatherMap format
-        forecast_list = []
-        for day in data['forecast']['forecastday']:
-            for hour in day['hour']:
-                from datetime import datetime
-                condition_text = hour['condition']['text'].lower()
-                icon = self._map_condition_to_icon(condition_text)
-                
-                forecast_item = {
-                    "dt": int(datetime.fromisoformat(hour['time'].replace(' ', 'T')).timestamp()),
-                    "main": {
-                        "temp": hour['temp_c'],
-                        "humidity": hour['humidity']
-                    },
-                    "weather": [{
-                        "main": hour['condition']['text'],
-                        "description": condition_text,
-                        "icon": icon
-                    }],
-                    "dt_txt": hour['time']
-                }
-                forecast_list.append(forecast_item)
-        
-        return {"list": forecast_list}
+    def _normalize_weatherapi_forecast(self, data: Dict) -> Dict:
+        """Convert a WeatherAPI.com forecast response to columnar forecast format.
+
+        Returns {"columns": {...}} with one array per field (see
+        weather_models.forecast_columns), built without per-hour dicts.
+        """
+        hours = [hour for day in data['forecast']['forecastday'] for hour in day['hour']]
+        conditions = [hour['condition'] for hour in hours]
+
+        if hours and 'time_epoch' in hours[0]:
+            dt = np.fromiter((hour['time_epoch'] for hour in hours), dtype=np.int64, count=len(hours))
+        else:
+            # Local "YYYY-MM-DD HH:MM" strings; shift by the location's UTC offset. The provider
+            # doesn't zero-pad the hour of `localtime` ("2024-06-01 9:05"), which numpy rejects
+            local = pd.to_datetime([hour['time'] for hour in hours]).asi8 // 10**9
+            location = data['location']
+            offset = pd.Timestamp(location['localtime']).value // 10**9 - location['localtime_epoch']
+            dt = local - (round(offset / 900) * 900)
+
+        # Descriptions and icons are looked up once per distinct condition, not per hour
+        texts, text_index = np.unique(np.array([condition['text'] for condition in conditions], dtype=str), return_inverse=True)
+        codes = np.fromiter((condition.get('code', 0) for condition in conditions), dtype=np.int32, count=len(hours))
+        positions = np.minimum(np.searchsorted(_ICON_CODES, codes), len(_ICON_CODES) - 1)
+        known = _ICON_CODES[positions] == codes
+        icons = np.where(known, _ICONS_BY_CODE[positions], "")
+        if not known.all():
+            # Codes missing from the table fall back to matching the condition text
+            fallback = np.array([self._map_condition_to_icon(text) for text in texts])
+            icons = np.where(known, icons, fallback[text_index])
+
+        return {
+            "columns": {
+                "dt": dt,
+                "temp": np.fromiter((hour['temp_c'] for hour in hours), dtype=np.float64, count=len(hours)),
+                "humidity": np.fromiter((hour['humidity'] for hour in hours), dtype=np.float64, count=len(hours)),
+                "condition": texts[text_index],
+                "description": np.char.lower(texts)[text_index],
+                "icon": icons
+            }
+        }
     
     def _get_openweather_forecast(self, city: str) -> Dict:
         """Get forecast from OpenWeatherMap"""
-        url = f"{self.base_url}/forecast"
+        url, params = self._openweather_forecast_request(city)
+        response = self._request(url, params)
+        if response.status_code != 200:
+            raise ProviderError(f"Failed to fetch forecast data for {city}: {response.text}", response.status_code)
+
+        return _decode_json(response.content)
+
+    def _openweather_forecast_request(self, city: str) -> Tuple[str, Dict]:
+        """URL and query parameters for an OpenWeatherMap forecast lookup"""
+        url = f"{self.base_urls['openweather']}/forecast"
         params = {
-            "q": f"{city},IL",
-            "appid": self.api_key,
+            **self._openweather_location(city),
+            "appid": self.openweather_key,
             "units": "metric"
         }
-        response = requests.get(url, params=params)
-        if response.status_code != 200:
-            raise Exception(f"Failed to fetch forecast data for {city}: {response.text}")
-
-        return response.json()
+        return url, params
         
     def _get_mock_forecast(self, city: str) -> Dict:
         """Provide mock forecast data for demonstration"""
         import random
         from datetime import datetime, timedelta
         
+        lat, lon = get_coordinates(city) or (31.77, 35.21)
+
         # Base temperature for the city with some seasonal adjustment
         current_month = datetime.now().month
         is_summer = 4 <= current_month <= 10
@@ -392,7 +1686,7 @@ class WeatherAPI:
             "city": {
                 "id": 281184,
                 "name": city,
-                "coord": {"lat": 31.77, "lon": 35.21},
+                "coord": {"lat": lat, "lon": lon},
                 "country": "IL",
                 "population": 1000000,
                 "timezone": 10800,
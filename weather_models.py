@@ -0,0 +1,107 @@
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+def forecast_columns(forecast: Dict) -> Dict[str, np.ndarray]:
+    """Column arrays (dt, temp, humidity, condition, description, icon) of a get_forecast response.
+
+    Accepts both the columnar format WeatherAPI.com forecasts are normalized
+    to and OpenWeatherMap's list of 3-hourly items (also used by mock data).
+    """
+    if "columns" in forecast:
+        return {name: np.asarray(values) for name, values in forecast["columns"].items()}
+
+    items = forecast["list"]
+    return {
+        "dt": np.array([item['dt'] for item in items], dtype=np.int64),
+        "temp": np.array([item['main']['temp'] for item in items], dtype=np.float64),
+        "humidity": np.array([item['main']['humidity'] for item in items], dtype=np.float64),
+        "condition": np.array([item['weather'][0]['main'] for item in items], dtype=str),
+        "description": np.array([item['weather'][0]['description'] for item in items], dtype=str),
+        "icon": np.array([item['weather'][0]['icon'] for item in items], dtype=str)
+    }
+
+
+class Observation:
+    """Current conditions for one city, flattened from a normalized provider response"""
+
+    __slots__ = (
+        "city", "lat", "lon", "temperature", "feels_like", "humidity", "pressure",
+        "wind_speed", "wind_degree", "wind_direction", "precipitation",
+        "condition", "description", "icon"
+    )
+
+    def __init__(
+        self,
+        city: str,
+        lat: Optional[float],
+        lon: Optional[float],
+        temperature: float,
+        feels_like: float,
+        humidity: float,
+        pressure: float,
+        wind_speed: float,
+        wind_degree: float,
+        wind_direction: str,
+        precipitation: float,
+        condition: str,
+        description: str,
+        icon: str
+    ):
+        self.city = city
+        self.lat = lat
+        self.lon = lon
+        self.temperature = temperature
+        self.feels_like = feels_like
+        self.humidity = humidity
+        self.pressure = pressure
+        self.wind_speed = wind_speed
+        self.wind_degree = wind_degree
+        self.wind_direction = wind_direction
+        self.precipitation = precipitation
+        self.condition = condition
+        self.description = description
+        self.icon = icon
+
+    @classmethod
+    def from_response(cls, city: str, data: Dict, coordinates: Optional[Tuple[float, float]] = None) -> "Observation":
+        """Build an observation from a get_current_weather response.
+
+        `coordinates` (lat, lon) take precedence over the provider's, which
+        drift with its geocoding.
+        """
+        main = data.get('main', {})
+        wind = data.get('wind', {})
+        weather = data.get('weather', [{}])[0]
+        if coordinates is None:
+            coord = data.get('coord', {})
+            coordinates = (coord.get('lat'), coord.get('lon'))
+
+        # Rain or snow over the last hour
+        precipitation = 0
+        if 'rain' in data:
+            precipitation = data['rain'].get('1h', 0)
+        elif 'snow' in data:
+            precipitation = data['snow'].get('1h', 0)
+
+        return cls(
+            city=city,
+            lat=coordinates[0],
+            lon=coordinates[1],
+            temperature=main.get('temp', 20),
+            feels_like=main.get('feels_like', main.get('temp', 20)),
+            humidity=main.get('humidity', 50),
+            pressure=main.get('pressure', 1013),
+            wind_speed=wind.get('speed', 0),
+            wind_degree=wind.get('deg', 0),
+            wind_direction=wind.get('direction', 'N'),
+            precipitation=precipitation,
+            condition=weather.get('main', ''),
+            description=weather.get('description', 'not available'),
+            icon=weather.get('icon', '')
+        )
+
+    def __repr__(self) -> str:
+        return f"Observation({self.city!r}, {self.temperature}°C, wind {self.wind_speed} {self.wind_direction})"
+
@@ -0,0 +1,253 @@
+import atexit
+import random
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Optional
+
+from city_registry import CITY_NAMES, city_key
+from weather_api import BATCH_MAX_WORKERS, PRIORITY_BACKGROUND, PRIORITY_HIGH, BatchResult, WeatherAPI
+from weather_models import Observation
+
+# Default seconds between refreshes of current conditions and of forecasts
+CURRENT_REFRESH_INTERVAL = 10 * 60
+FORECAST_REFRESH_INTERVAL = 30 * 60
+
+# Snapshot entries older than this (a couple of missed refreshes) are fetched through
+# the API instead of being served from the snapshot
+SNAPSHOT_MAX_AGE = 2 * CURRENT_REFRESH_INTERVAL
+
+# Each run is shifted by up to this fraction of its interval, so restarts don't line up
+REFRESH_JITTER = 0.1
+
+# Cities are refreshed in batches of at most this many, sized to what the provider's rate
+# limit lets through in a second. Between batches the refresher waits for the limiter to
+# refill, plus a short random pause, so a full refresh doesn't burst the provider
+FORECAST_BATCH_SIZE = BATCH_MAX_WORKERS
+FORECAST_BATCH_PAUSE = 2.0
+
+
+class CityWeather(NamedTuple):
+    """Latest known weather for one city, with the time each part was fetched"""
+    current: Optional[Dict]
+    current_fetched_at: Optional[float]
+    forecast: Optional[Dict]
+    forecast_fetched_at: Optional[float]
+    observation: Optional[Observation] = None
+
+
+_EMPTY_CITY = CityWeather(None, None, None, None)
+
+
+class WeatherSnapshot:
+    """Immutable view of the weather for every refreshed city at one point in time"""
+
+    __slots__ = ("cities", "created_at")
+
+    def __init__(self, cities: Mapping[str, CityWeather], created_at: float):
+        self.cities = MappingProxyType(dict(cities))
+        self.created_at = created_at
+
+    def get(self, city: str) -> Optional[CityWeather]:
+        """Weather for a city by English name (any known spelling), or None if it hasn't been refreshed yet"""
+        return self.cities.get(city_key(city))
+
+    def staleness(self, city: str) -> Optional[float]:
+        """Seconds since the city's current conditions were fetched"""
+        entry = self.get(city)
+        if entry is None or entry.current_fetched_at is None:
+            return None
+        return time.time() - entry.current_fetched_at
+
+
+def default_cities() -> List[str]:
+    """Every city in the registry (which includes the AR overlay cities)"""
+    return list(CITY_NAMES)
+
+
+class WeatherRefresher:
+    """Keeps a national weather snapshot warm from a background thread.
+
+    Pages read `snapshot` without touching the provider; the refresh thread
+    fetches every city from the provider (bypassing the response cache) and
+    replaces it with a new immutable snapshot after every run.
+    """
+
+    def __init__(
+        self,
+        cities: Optional[List[str]] = None,
+        current_interval: float = CURRENT_REFRESH_INTERVAL,
+        forecast_interval: float = FORECAST_REFRESH_INTERVAL,
+        jitter: float = REFRESH_JITTER,
+        max_age: float = SNAPSHOT_MAX_AGE
+    ):
+        self.cities = cities if cities is not None else default_cities()
+        self.current_interval = current_interval
+        self.forecast_interval = forecast_interval
+        self.jitter = jitter
+        self.max_age = max_age
+
+        self.snapshot = WeatherSnapshot({}, time.time())
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the refresh thread if it isn't running"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="weather-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Ask the refresh thread to exit and wait for it"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def get_current_weather_many(
+        self,
+        cities: List[str],
+        api: Optional[WeatherAPI] = None,
+        priority: str = PRIORITY_HIGH
+    ) -> List[BatchResult]:
+        """Current weather for several cities from the snapshot, fetching only cities it lacks or holds too old"""
+        results: List[Optional[BatchResult]] = []
+        for city in cities:
+            entry = self._current_entry(city)
+            if entry is not None:
+                results.append(BatchResult(city, entry.current, None))
+            else:
+                results.append(None)
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            api = api or WeatherAPI()
+            for i, result in zip(missing, api.get_current_weather_many([cities[i] for i in missing], priority)):
+                results[i] = result
+        return results
+
+    def get_observations_many(
+        self,
+        cities: List[str],
+        api: Optional[WeatherAPI] = None,
+        priority: str = PRIORITY_HIGH
+    ) -> List[BatchResult]:
+        """Current weather for several cities as Observation records, fetching cities the snapshot lacks or holds too old"""
+        results: List[Optional[BatchResult]] = []
+        for city in cities:
+            entry = self._current_entry(city)
+            if entry is not None and entry.observation is not None:
+                results.append(BatchResult(city, entry.observation, None))
+            else:
+                results.append(None)
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            api = api or WeatherAPI()
+            for i, result in zip(missing, api.get_observations_many([cities[i] for i in missing], priority)):
+                results[i] = result
+        return results
+
+    def _current_entry(self, city: str) -> Optional[CityWeather]:
+        """Snapshot entry of a city if it has current conditions no older than max_age"""
+        staleness = self.snapshot.staleness(city)
+        if staleness is None or staleness > self.max_age:
+            return None
+        return self.snapshot.get(city)
+
+    def _jittered(self, interval: float) -> float:
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _run(self):
+        next_current = next_forecast = time.time()
+        while not self._stop.is_set():
+            if time.time() >= next_forecast:
+                # Bundles also bring current conditions, so this run covers both
+                self._refresh_forecasts()
+                next_forecast = time.time() + self._jittered(self.forecast_interval)
+                next_current = time.time() + self._jittered(self.current_interval)
+            elif time.time() >= next_current:
+                self._refresh_current()
+                next_current = time.time() + self._jittered(self.current_interval)
+
+            self._stop.wait(max(0.0, min(next_current, next_forecast) - time.time()))
+
+    def _refresh_current(self):
+        """Refresh current conditions for every city (bulk requests where supported)"""
+        api = WeatherAPI()
+        # A few bulk requests cover every city; single-city requests are paced to the rate limit
+        size = len(self.cities) if api._supports_bulk() else self._batch_size(api, 1)
+        for batch in self._paced_batches(api, size, 1):
+            updates = {}
+            for result in api.get_current_weather_many(batch, PRIORITY_BACKGROUND, force=True):
+                if result.error is None:
+                    updates[result.city] = {"current": result.data}
+            self._publish(api, updates)
+
+    def _refresh_forecasts(self):
+        """Refresh forecasts and current conditions, a batch of cities at a time"""
+        api = WeatherAPI()
+        # WeatherAPI.com bundles are one request; other providers need two per city
+        cost = 1 if api.use_weatherapi else 2
+        for batch in self._paced_batches(api, self._batch_size(api, cost), cost):
+            updates = {}
+            for result in api.get_weather_bundle_many(batch, PRIORITY_BACKGROUND, force=True):
+                if result.error is None:
+                    updates[result.city] = result.data
+            self._publish(api, updates)
+
+    @staticmethod
+    def _batch_size(api: WeatherAPI, cost: int) -> int:
+        """Cities per batch: as many as the provider's rate limiter lets through at once"""
+        if api.rate_limiter is None:
+            return FORECAST_BATCH_SIZE
+        return max(1, min(FORECAST_BATCH_SIZE, int(api.rate_limiter.per_second // cost)))
+
+    def _paced_batches(self, api: WeatherAPI, size: int, cost: int):
+        """Yield batches of cities, waiting between them for the rate limiter to refill; stops on shutdown"""
+        size = max(1, size)
+        for start in range(0, len(self.cities), size):
+            if start:
+                pause = random.uniform(0, FORECAST_BATCH_PAUSE)
+                if api.rate_limiter is not None:
+                    pause += size * cost / api.rate_limiter.per_second
+                if self._stop.wait(pause):
+                    return
+            yield self.cities[start:start + size]
+
+    def _publish(self, api: WeatherAPI, updates: Dict[str, Dict]):
+        """Swap in a new snapshot with the updated cities; failed cities keep their last data"""
+        cities = dict(self.snapshot.cities)
+        for city, parts in updates.items():
+            query_city = api._resolve_city(city)
+            entry = cities.get(city_key(query_city), _EMPTY_CITY)
+            if "current" in parts:
+                entry = entry._replace(
+                    current=parts["current"],
+                    current_fetched_at=api.cache.fetched_at(api._cache_key("current", query_city)) or time.time(),
+                    observation=api._observation(query_city, parts["current"])
+                )
+            if "forecast" in parts:
+                entry = entry._replace(
+                    forecast=parts["forecast"],
+                    forecast_fetched_at=api.cache.fetched_at(api._cache_key("forecast", query_city)) or time.time()
+                )
+            cities[city_key(query_city)] = entry
+        self.snapshot = WeatherSnapshot(cities, time.time())
+
+
+_refresher: Optional[WeatherRefresher] = None
+_refresher_lock = threading.Lock()
+
+
+def start_refresher(**kwargs) -> WeatherRefresher:
+    """Start the process-wide refresher on first call and return it"""
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None:
+            _refresher = WeatherRefresher(**kwargs)
+            _refresher.start()
+            atexit.register(_refresher.stop)
+        return _refresher
@@ -1,70 +1,155 @@
 import streamlit as st
 import plotly.graph_objects as go
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Optional
 import json
 import math
 
+from city_registry import City, get_city
+from spatial_index import get_spatial_index
+from weather_models import Observation
+
+# Major cities shown on the wind overlay
+WIND_OVERLAY_CITIES = ("Jerusalem", "Tel Aviv", "Haifa", "Be'er Sheva", "Eilat", "Netanya", "Nazareth", "Ashdod")
+
+# Clicks further than this from every city don't select one
+WIND_CLICK_MAX_DISTANCE_KM = 25
+
 # Israel map boundaries (approximate)
 ISRAEL_BOUNDS = {
     'lat': (29.5, 33.3),  # South to North
     'lon': (34.2, 35.9)   # West to East
 }
 
-def create_wind_arrows(lat, lon, wind_speed, wind_direction_deg, color='red', scale=0.02):
-    """Create arrow coordinates for wind visualization"""
+def create_wind_arrows(lat, lon, wind_speed, wind_direction_deg, color='red', scale=0.02, offsets=None):
+    """Create arrow coordinates for wind visualization, for many cities and frames at once.
+
+    `lat`, `lon`, `wind_speed` and `wind_direction_deg` are scalars or
+    arrays over cities; `offsets` are per-frame distances (in degrees) each
+    arrow is moved along its wind direction (default: a single frame at
+    its city). Shafts come back as (frames, cities, 2) lat/lon arrays and
+    arrowheads as closed (frames, cities, 4) polygons.
+    """
+    lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+    lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+    wind_speed = np.atleast_1d(np.asarray(wind_speed, dtype=np.float64))
+    wind_direction_deg = np.atleast_1d(np.asarray(wind_direction_deg, dtype=np.float64))
+    offsets = np.zeros(1) if offsets is None else np.asarray(offsets, dtype=np.float64)
+
     # Convert meteorological wind direction (where wind comes FROM) to mathematical angle
     # Meteorological: 0° = North, 90° = East, 180° = South, 270° = West
     # Mathematical: 0° = East, 90° = North, 180° = West, 270° = South
-    # We want to show where wind is GOING TO (add 180°) and convert to math coordinates
     math_angle = np.radians(90 - wind_direction_deg)  # Convert to math coordinates
-    
+    sin_angle, cos_angle = np.sin(math_angle), np.cos(math_angle)
+
+    # Arrow bases for every frame: (frames, cities)
+    start_lat = lat + offsets[:, np.newaxis] * sin_angle
+    start_lon = lon + offsets[:, np.newaxis] * cos_angle
+
     # Scale arrow length based on wind speed (minimum visible length)
-    length = max(wind_speed * scale, 0.01)
-    
+    length = np.maximum(wind_speed * scale, 0.01)
+
     # Calculate arrow endpoint
-    end_lat = lat + length * np.sin(math_angle)
-    end_lon = lon + length * np.cos(math_angle)
-    
+    end_lat = start_lat + length * sin_angle
+    end_lon = start_lon + length * cos_angle
+
     # Create arrowhead points
     head_angle = np.radians(25)  # Narrower arrowhead
     head_length = length * 0.4
-    
-    # Calculate arrowhead points
     left_angle = math_angle + head_angle + np.pi
     right_angle = math_angle - head_angle + np.pi
-    
+
     left_lat = end_lat + head_length * np.sin(left_angle)
     left_lon = end_lon + head_length * np.cos(left_angle)
-    
     right_lat = end_lat + head_length * np.sin(right_angle)
     right_lon = end_lon + head_length * np.cos(right_angle)
-    
+
     return {
-        'shaft': {'lat': [lat, end_lat], 'lon': [lon, end_lon]},
-        'head': {'lat': [left_lat, end_lat, right_lat, left_lat], 'lon': [left_lon, end_lon, right_lon, left_lon]},
+        'shaft': {
+            'lat': np.stack([start_lat, end_lat], axis=-1),
+            'lon': np.stack([start_lon, end_lon], axis=-1)
+        },
+        'head': {
+            'lat': np.stack([left_lat, end_lat, right_lat, left_lat], axis=-1),
+            'lon': np.stack([left_lon, end_lon, right_lon, left_lon], axis=-1)
+        },
         'wind_speed': wind_speed,
         'direction': wind_direction_deg
     }
 
-def create_wind_overlay(city_data: List[Dict]):
-    """Create an animated wind and precipitation overlay for Israeli cities"""
+def _segments(points: np.ndarray) -> np.ndarray:
+    """Flatten (cities, points) coordinates into one sequence with a gap (NaN) after each city.
+
+    Plotly draws NaN like None, but a float array is copied and serialized
+    as a single binary block rather than element by element.
+    """
+    segments = np.full((points.shape[0], points.shape[1] + 1), np.nan)
+    segments[:, :-1] = points
+    return segments.ravel()
+
+def _wind_arrow_traces(arrows: Dict, frame: int, hover: np.ndarray, color: str) -> List[go.Scattermapbox]:
+    """Shaft and head traces for one frame of create_wind_arrows output.
+
+    Arrows are gap-separated segments of just two traces, whatever the
+    number of cities. `hover` holds each city's hover text, repeated onto
+    its points as a flat string array (2-D customdata of strings is copied
+    element by element by plotly, which dominated build time).
+    """
+    shaft_lat, shaft_lon = arrows['shaft']['lat'][frame], arrows['shaft']['lon'][frame]
+    head_lat, head_lon = arrows['head']['lat'][frame], arrows['head']['lon'][frame]
+
+    return [
+        go.Scattermapbox(
+            lat=_segments(shaft_lat),
+            lon=_segments(shaft_lon),
+            mode='lines',
+            line=dict(width=4, color=color),
+            hovertext=np.repeat(hover, shaft_lat.shape[1] + 1),
+            name="Wind",
+            showlegend=False,
+            hovertemplate="%{hovertext}<extra></extra>"
+        ),
+        # Arrowheads as filled polygons
+        go.Scattermapbox(
+            lat=_segments(head_lat),
+            lon=_segments(head_lon),
+            mode='lines',
+            line=dict(width=4, color=color),
+            fill='toself',
+            fillcolor=color,
+            hovertext=np.repeat(hover, head_lat.shape[1] + 1),
+            showlegend=False,
+            hovertemplate="%{hovertext}<extra></extra>"
+        )
+    ]
+
+def create_wind_overlay(observations: List[Observation], labels: Optional[List[str]] = None):
+    """Create an animated wind and precipitation overlay for Israeli cities.
+
+    `labels` are the map labels for the observations (default: their city names).
+    """
     
     # Create figure with map
     fig = go.Figure()
 
     # Add city markers with weather info
-    valid_cities = [city for city in city_data if 'wind_speed' in city and 'wind_degree' in city]
+    if labels is None:
+        labels = [observation.city for observation in observations]
+    valid = [
+        (observation, label) for observation, label in zip(observations, labels)
+        if observation.lat is not None and observation.lon is not None
+    ]
     
-    if not valid_cities:
+    if not valid:
         st.warning("No wind data available for visualization")
         return fig
+    valid_cities = [observation for observation, _ in valid]
 
     # Add city markers with temperature color coding
-    temperatures = [city.get('temperature', 20) for city in valid_cities]
+    temperatures = [city.temperature for city in valid_cities]
     fig.add_trace(go.Scattermapbox(
-        lat=[city['lat'] for city in valid_cities],
-        lon=[city['lon'] for city in valid_cities],
+        lat=[city.lat for city in valid_cities],
+        lon=[city.lon for city in valid_cities],
         mode='markers+text',
         marker=dict(
             size=18,
@@ -79,119 +164,55 @@ def create_wind_overlay(city_data: List[Dict]):
                 len=0.7
             )
         ),
-        text=[city.get('hebrew_city', city['city']) for city in valid_cities],
+        text=[label for _, label in valid],
         textposition="bottom center",
         textfont=dict(size=11, color='white'),
         name='Cities',
         hovertemplate='<b>%{text}</b><br>Temperature: %{marker.color:.1f}°C<br>Click for details<extra></extra>'
     ))
 
-    # Add precipitation layer if available
-    for city in valid_cities:
-        if 'precipitation' in city and city['precipitation'] > 0:
-            # Add precipitation circles
-            fig.add_trace(go.Scattermapbox(
-                lat=[city['lat']],
-                lon=[city['lon']],
-                mode='markers',
-                marker=dict(
-                    size=city['precipitation'] * 3,  # Scale size by precipitation
-                    color='rgba(0, 100, 255, 0.3)',
-                    symbol='circle'
-                ),
-                name=f"Rain - {city['city']}",
-                showlegend=False,
-                hovertemplate=f"<b>{city['city']}</b><br>Precipitation: {city['precipitation']}mm<extra></extra>"
-            ))
-
-    # Create animated wind flow patterns - simplified for better performance
-    frames = []
-    base_traces = list(fig.data)  # Keep city markers and precipitation
-    
-    for frame_i in range(8):  # Reduced frames for better performance
-        frame_traces = base_traces.copy()
-        
-        for city in valid_cities:
-            wind_direction = city['wind_degree']
-            wind_speed = city['wind_speed']
-            
-            # Create flowing effect by moving arrow position along wind direction
-            flow_distance = (frame_i / 8.0) * 0.05  # Flow distance based on frame
-            math_angle = np.radians(90 - wind_direction)
-            
-            # Calculate flowing position
-            flow_lat = city['lat'] + flow_distance * np.sin(math_angle)
-            flow_lon = city['lon'] + flow_distance * np.cos(math_angle)
-            
-            # Create wind arrow at flowing position
-            arrow = create_wind_arrows(
-                flow_lat,
-                flow_lon,
-                wind_speed,
-                wind_direction,
-                scale=0.015
-            )
-            
-            # Add arrow shaft
-            frame_traces.append(go.Scattermapbox(
-                lat=arrow['shaft']['lat'],
-                lon=arrow['shaft']['lon'],
-                mode='lines',
-                line=dict(width=4, color='red'),
-                name=f"Wind - {city['city']}",
-                showlegend=False,
-                hovertemplate=f"<b>{city['city']}</b><br>Wind Speed: {city['wind_speed']} km/h<br>Direction: {city.get('wind_direction', 'N/A')}<extra></extra>"
-            ))
-            
-            # Add arrowhead as filled polygon
-            frame_traces.append(go.Scattermapbox(
-                lat=arrow['head']['lat'],
-                lon=arrow['head']['lon'],
-                mode='lines',
-                line=dict(width=4, color='red'),
-                fill='toself',
-                fillcolor='red',
-                showlegend=False,
-                hovertemplate=f"<b>{city['city']}</b><br>Wind Speed: {city['wind_speed']} km/h<extra></extra>"
-            ))
-        
-        frames.append(go.Frame(data=frame_traces, name=f'frame{frame_i}'))
-
-    # Add initial static wind arrows to the base figure
-    for city in valid_cities:
-        arrow = create_wind_arrows(
-            city['lat'], 
-            city['lon'], 
-            city['wind_speed'], 
-            city['wind_degree'],
-            scale=0.015
-        )
-        
-        # Add arrow shaft
-        fig.add_trace(go.Scattermapbox(
-            lat=arrow['shaft']['lat'],
-            lon=arrow['shaft']['lon'],
-            mode='lines',
-            line=dict(width=4, color='darkred'),
-            name=f"Wind - {city['city']}",
-            showlegend=False,
-            hovertemplate=f"<b>{city['city']}</b><br>Wind Speed: {city['wind_speed']} km/h<br>Direction: {city.get('wind_direction', 'N/A')}<extra></extra>"
-        ))
-        
-        # Add arrowhead as filled polygon
-        fig.add_trace(go.Scattermapbox(
-            lat=arrow['head']['lat'],
-            lon=arrow['head']['lon'],
-            mode='lines',
-            line=dict(width=4, color='darkred'),
-            fill='toself',
-            fillcolor='darkred',
-            showlegend=False,
-            hovertemplate=f"<b>{city['city']}</b><br>Wind Speed: {city['wind_speed']} km/h<br>Direction: {city.get('wind_direction', 'N/A')}<extra></extra>"
-        ))
+    # Precipitation halos for every raining city, in one trace
+    raining = [city for city in valid_cities if city.precipitation > 0]
+    fig.add_trace(go.Scattermapbox(
+        lat=[city.lat for city in raining],
+        lon=[city.lon for city in raining],
+        mode='markers',
+        marker=dict(
+            size=[city.precipitation * 3 for city in raining],  # Scale size by precipitation
+            color='rgba(0, 100, 255, 0.3)',
+            symbol='circle'
+        ),
+        customdata=[[city.city, city.precipitation] for city in raining],
+        name="Rain",
+        showlegend=False,
+        hovertemplate="<b>%{customdata[0]}</b><br>Precipitation: %{customdata[1]}mm<extra></extra>"
+    ))
+
+    # Wind arrows for every city and animation frame in one pass; the flow animation
+    # moves each arrow along its wind direction
+    arrows = create_wind_arrows(
+        [city.lat for city in valid_cities],
+        [city.lon for city in valid_cities],
+        [city.wind_speed for city in valid_cities],
+        [city.wind_degree for city in valid_cities],
+        scale=0.015,
+        offsets=np.arange(8) / 8.0 * 0.05  # Reduced frames for better performance
+    )
+    hover = np.array([
+        f"<b>{city.city}</b><br>Wind Speed: {city.wind_speed} km/h<br>Direction: {city.wind_direction}"
+        for city in valid_cities
+    ])
 
-    # Add frames to figure
-    fig.frames = frames
+    # Static wind arrows (the first frame sits on the cities): every shaft in one
+    # trace and every head in another
+    fig.add_traces(_wind_arrow_traces(arrows, 0, hover, 'darkred'))
+    arrow_traces = [len(fig.data) - 2, len(fig.data) - 1]
+
+    # Animated wind flow: each frame only replaces the two arrow traces
+    fig.frames = [
+        go.Frame(data=_wind_arrow_traces(arrows, frame_i, hover, 'red'), traces=arrow_traces, name=f'frame{frame_i}')
+        for frame_i in range(len(arrows['shaft']['lat']))
+    ]
 
     # Configure layout and animation
     fig.update_layout(
@@ -243,15 +264,21 @@ def create_wind_overlay(city_data: List[Dict]):
 
     return fig
 
+def get_selected_city(event) -> Optional[City]:
+    """City nearest to the point clicked on the overlay, from st.plotly_chart's selection event"""
+    points = event.get("selection", {}).get("points", []) if event else []
+    for point in points:
+        if point.get("lat") is not None and point.get("lon") is not None:
+            return get_spatial_index().nearest_city(point["lat"], point["lon"], WIND_CLICK_MAX_DISTANCE_KM)
+    return None
+
 def get_city_coordinates():
-    """Return hardcoded coordinates for major Israeli cities"""
-    return [
-        {"city": "Jerusalem", "hebrew_city": "ירושלים", "lat": 31.7683, "lon": 35.2137},
-        {"city": "Tel Aviv", "hebrew_city": "תל אביב", "lat": 32.0853, "lon": 34.7818},
-        {"city": "Haifa", "hebrew_city": "חיפה", "lat": 32.7940, "lon": 34.9896},
-        {"city": "Beer Sheva", "hebrew_city": "באר שבע", "lat": 31.2516, "lon": 34.7915},
-        {"city": "Eilat", "hebrew_city": "אילת", "lat": 29.5577, "lon": 34.9519},
-        {"city": "Netanya", "hebrew_city": "נתניה", "lat": 32.3329, "lon": 34.8599},
-        {"city": "Nazareth", "hebrew_city": "נצרת", "lat": 32.7021, "lon": 35.2978},
-        {"city": "Ashdod", "hebrew_city": "אשדוד", "lat": 31.8044, "lon": 34.6448}
-    ]
+    """Return coordinates for the major Israeli cities shown on the wind overlay (read-only)"""
+    return _OVERLAY_COORDINATES
+
+
+# Built once from the city registry rather than on every rerun
+_OVERLAY_COORDINATES = [
+    {"city": city.english, "hebrew_city": city.hebrew, "lat": city.lat, "lon": city.lon}
+    for city in map(get_city, WIND_OVERLAY_CITIES)
+]